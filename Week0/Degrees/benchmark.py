@@ -0,0 +1,109 @@
+import random
+import sys
+import time
+import tracemalloc
+
+import degrees
+from graph import Graph
+from landmarks import LandmarkIndex
+from util import SearchStats
+
+
+def generate(num_people, num_movies, seed=0):
+    """
+    Returns rows for degrees.ingest describing a synthetic scale-free
+    actor graph: each movie casts 2 to 8 people, most of them picked
+    in proportion to how many movies they have already starred in.
+    """
+    rng = random.Random(seed)
+    rows = {
+        "people": [
+            {"id": str(i), "name": f"Person {i}", "birth": str(1930 + i % 70)}
+            for i in range(num_people)
+        ],
+        "movies": [
+            {"id": f"m{i}", "title": f"Movie {i}", "year": str(1950 + i % 70)}
+            for i in range(num_movies)
+        ],
+        "stars": [],
+    }
+
+    # Every appearance is listed once, so sampling it is preferential
+    appearances = []
+    for movie in range(num_movies):
+        cast = set()
+        for _ in range(rng.randint(2, 8)):
+            if appearances and rng.random() < 0.8:
+                cast.add(rng.choice(appearances))
+            else:
+                cast.add(rng.randrange(num_people))
+        for person in cast:
+            appearances.append(person)
+            rows["stars"].append({"person_id": str(person), "movie_id": f"m{movie}"})
+    return rows
+
+
+def run(strategy, queries):
+    """
+    Answers every query with one search strategy and returns
+    the list of path lengths, None where not connected.
+    """
+    return [
+        None if path is None else len(path)
+        for path in (strategy(source, target) for source, target in queries)
+    ]
+
+
+def main():
+    if len(sys.argv) > 4:
+        sys.exit("Usage: python benchmark.py [people] [queries] [seed]")
+    num_people = int(sys.argv[1]) if len(sys.argv) >= 2 else 20000
+    num_queries = int(sys.argv[2]) if len(sys.argv) >= 3 else 100
+    seed = int(sys.argv[3]) if len(sys.argv) == 4 else 0
+
+    print(f"Generating {num_people} people...")
+    degrees.ingest(generate(num_people, num_people // 2, seed))
+    graph = Graph.from_data(degrees.people, degrees.movies)
+    index = LandmarkIndex.build(graph, 16)
+
+    rng = random.Random(seed)
+    person_ids = list(degrees.people)
+    queries = [
+        (rng.choice(person_ids), rng.choice(person_ids)) for _ in range(num_queries)
+    ]
+
+    strategies = {
+        "bfs": lambda s, t: degrees.shortest_path(s, t),
+        "bidirectional": lambda s, t: degrees.shortest_path(s, t, bidirectional=True),
+        "graph": lambda s, t: degrees.shortest_path(s, t, graph=graph),
+        "landmarks": lambda s, t: degrees.shortest_path(s, t, landmarks=index),
+    }
+
+    stats = SearchStats()
+    degrees.stats = graph.stats = stats
+    expected = None
+    for name, strategy in strategies.items():
+        stats.reset()
+        start = time.perf_counter()
+        lengths = run(strategy, queries)
+        elapsed = time.perf_counter() - start
+
+        if expected is None:
+            expected = lengths
+        elif lengths != expected:
+            sys.exit(f"{name} disagrees with bfs on path lengths")
+
+        print(f"{name}: {num_queries / elapsed:.1f} queries/s, "
+              f"{stats.expansions / elapsed:.0f} expansions/s")
+        print(f"    {stats}")
+
+        # Memory is measured in a second pass, as tracing slows searches down
+        tracemalloc.start()
+        run(strategy, queries)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"    peak memory {peak / 1024:.0f} KiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,15 @@
 import csv
 from inspect import trace
+import multiprocessing
 import sys
+import time
 
-from util import Node, StackFrontier, QueueFrontier
+from graph import UNREACHABLE, load_graph
+from snapshot import (
+    SnapshotNames, SnapshotRecords, append_journal, build_snapshot,
+    read_journal, read_snapshot, snapshot_is_fresh
+)
+from util import Node, IndexedQueueFrontier
 
 # Maps names to a set of corresponding person_ids
 names = {}
@@ -13,11 +20,35 @@ people = {}
 # Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
 movies = {}
 
+# Maps source person_ids to (bfs_tree, depths), least recently used first
+tree_cache = {}
+TREE_CACHE_SIZE = 64
+
+# Set to a util.SearchStats to count the work done by searches
+stats = None
+
+# Columns of each CSV file, in order
+CSV_FIELDS = {
+    "people": ["id", "name", "birth"],
+    "movies": ["id", "title", "year"],
+    "stars": ["person_id", "movie_id"],
+}
+
 
 def load_data(directory):
     """
     Load data from CSV files into memory.
+
+    If directory holds a snapshot newer than the CSV files
+    (see snapshot.py), it is loaded instead, along with any rows
+    ingested since it was built.
     """
+    if snapshot_is_fresh(directory):
+        load_snapshot(read_snapshot(directory))
+        for rows in read_journal(directory):
+            ingest(rows)
+        return
+
     # Load people
     with open(f"{directory}/people.csv", encoding="utf-8") as f:
         reader = csv.DictReader(f)
@@ -53,6 +84,139 @@ def load_data(directory):
                 pass
 
 
+def load_snapshot(snapshot):
+    """
+    Load data from a snapshot returned by snapshot.read_snapshot.
+
+    names, people and movies are replaced by dict-like views of the
+    memory-mapped snapshot, so loading takes no time and each record
+    is only built when it is first looked up. Modules using the data
+    should refer to degrees.people rather than import it.
+    """
+    global names, people, movies
+    person_ids = snapshot["person_ids"]
+    movie_ids = snapshot["movie_ids"]
+    names = SnapshotNames(person_ids, snapshot["person_names"])
+    people = SnapshotRecords(
+        person_ids,
+        {"name": snapshot["person_names"], "birth": snapshot["person_births"]},
+        "movies", snapshot["person_offsets"], snapshot["person_movies"], movie_ids
+    )
+    movies = SnapshotRecords(
+        movie_ids,
+        {"title": snapshot["movie_titles"], "year": snapshot["movie_years"]},
+        "stars", snapshot["movie_offsets"], snapshot["movie_people"], person_ids
+    )
+
+
+def new_rows(rows):
+    """
+    Returns the rows of an ingest batch that would change the data:
+    people and movies with ids not seen before, and stars linking a
+    known person to a known movie they are not yet linked to.
+
+    rows and the result are dicts of "people", "movies" and "stars"
+    lists of CSV rows as dicts; only the first of repeated rows is kept.
+    """
+    applied = {kind: [] for kind in CSV_FIELDS}
+    person_ids = set()
+    for row in rows.get("people", []):
+        if row["id"] not in people and row["id"] not in person_ids:
+            person_ids.add(row["id"])
+            applied["people"].append(row)
+
+    movie_ids = set()
+    for row in rows.get("movies", []):
+        if row["id"] not in movies and row["id"] not in movie_ids:
+            movie_ids.add(row["id"])
+            applied["movies"].append(row)
+
+    links = set()
+    for row in rows.get("stars", []):
+        link = person_id, movie_id = row["person_id"], row["movie_id"]
+        if link in links:
+            continue
+        if person_id not in people and person_id not in person_ids:
+            continue
+        if movie_id not in movies and movie_id not in movie_ids:
+            continue
+        if movie_id in movies and person_id in movies[movie_id]["stars"]:
+            continue
+        links.add(link)
+        applied["stars"].append(row)
+    return applied
+
+
+def ingest(rows, directory=None):
+    """
+    Adds new rows to the data in memory without reloading it.
+
+    rows is a dict with optional "people", "movies" and "stars" lists of
+    CSV rows as dicts; only those returned by new_rows are applied. If
+    directory is given, the applied rows are also appended to its CSV
+    files and to the journal of its snapshot, if it has one, so every
+    way of reloading the data gives the same result.
+
+    Cached BFS trees whose distances the new rows could change are
+    dropped; returns the set of sources that were invalidated.
+    """
+    rows = new_rows(rows)
+    if directory is not None and any(rows.values()):
+        has_snapshot = snapshot_is_fresh(directory)
+        for kind, fields in CSV_FIELDS.items():
+            if rows[kind]:
+                with open(f"{directory}/{kind}.csv", "a", encoding="utf-8",
+                          newline="") as f:
+                    csv.DictWriter(f, fields, extrasaction="ignore").writerows(rows[kind])
+        if has_snapshot:
+            append_journal(directory, rows)
+
+    for row in rows["people"]:
+        people[row["id"]] = {
+            "name": row["name"],
+            "birth": row["birth"],
+            "movies": set()
+        }
+        names.setdefault(row["name"].lower(), set()).add(row["id"])
+
+    for row in rows["movies"]:
+        movies[row["id"]] = {
+            "title": row["title"],
+            "year": row["year"],
+            "stars": set()
+        }
+
+    invalidated = set()
+    for row in rows["stars"]:
+        person_id, movie_id = row["person_id"], row["movie_id"]
+        stars = movies[movie_id]["stars"]
+        for source, (_, depths) in list(tree_cache.items()):
+            if star_changes_tree(depths, person_id, stars):
+                del tree_cache[source]
+                invalidated.add(source)
+        people[person_id]["movies"].add(movie_id)
+        stars.add(person_id)
+    return invalidated
+
+
+def star_changes_tree(depths, person_id, stars):
+    """
+    Returns True if linking person_id to everyone in stars could change
+    the distances of a BFS tree, given its depth per reached person.
+
+    A new edge leaves all distances unchanged exactly when its two
+    ends are at most one degree apart from the root (or both unreached).
+    """
+    depth = depths.get(person_id)
+    for other in stars:
+        other_depth = depths.get(other)
+        if depth is None and other_depth is None:
+            continue
+        if depth is None or other_depth is None or abs(depth - other_depth) > 1:
+            return True
+    return False
+
+
 def main():
     if len(sys.argv) > 2:
         sys.exit("Usage: python degrees.py [directory]")
@@ -97,31 +261,54 @@ def trace_path(vertex):
 
     return correct_path   
 
-def shortest_path(source, target):
+def shortest_path(source, target, bidirectional=False, graph=None,
+                  landmarks=None):
     """
     Returns the shortest list of (movie_id, person_id) pairs
     that connect the source to the target.
 
+    If bidirectional is True, searches from both ends at once
+    (see bidirectional_shortest_path). If graph is given, the search
+    runs over that compact Graph instead of the people and movies dicts.
+    If landmarks is given, the search is bounded and pruned by that
+    LandmarkIndex (see LandmarkIndex.shortest_path).
+
+    If stats is set to a util.SearchStats, every search made through
+    this function is counted in it; graph and landmark searches are
+    counted in graph.stats instead.
+
     If no possible path, returns None.
     """
+    if stats is not None:
+        stats.searches += 1
+    if landmarks is not None:
+        return landmarks.shortest_path(source, target)
+    if graph is not None:
+        return graph.shortest_path(source, target)
+    if bidirectional:
+        return bidirectional_shortest_path(source, target)
+
     starting = Node(source, None, None)
-    queue = QueueFrontier()
+    queue = IndexedQueueFrontier()
     queue.add(starting)
 
-    check_arr = []
+    check_arr = set()
 
 
     while(1):
         if(queue.empty()):
             return None
         
+        if stats is not None:
+            stats.expansions += 1
+            stats.frontier(len(queue.frontier))
         vertex = queue.remove()
 
         if(vertex.state == target):
             path = trace_path(vertex)
             return path
         
-        check_arr.append(vertex.state)
+        check_arr.add(vertex.state)
 
         #  returns Neighbours = (movie_id, person_id) as a set and NOT List
         neighbours = neighbors_for_person(vertex.state)
@@ -145,6 +332,210 @@ def shortest_path(source, target):
     raise NotImplementedError
 
 
+def bidirectional_shortest_path(source, target):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, searching breadth-first
+    from the source and the target alternately.
+
+    Each step expands one full layer of whichever frontier is smaller,
+    so high-degree actors near only one end are not explored needlessly.
+
+    If no possible path, returns None.
+    """
+    if source == target:
+        return []
+
+    # Maps person_id to (movie_id, person_id) of the step towards the
+    # source (forward) or the target (backward); None for the endpoints
+    forward = {source: None}
+    backward = {target: None}
+    forward_layer = [source]
+    backward_layer = [target]
+
+    while forward_layer and backward_layer:
+        if len(forward_layer) <= len(backward_layer):
+            meeting, forward_layer = expand_layer(forward_layer, forward, backward)
+        else:
+            meeting, backward_layer = expand_layer(backward_layer, backward, forward)
+
+        if meeting is not None:
+            return join_paths(meeting, forward, backward)
+
+    return None
+
+
+def expand_layer(layer, visited, other_visited):
+    """
+    Expands every person in layer by one step, recording parents in visited.
+
+    Returns (meeting, next_layer), where meeting is the first person also
+    reached by the search from the other end, or None.
+    """
+    next_layer = []
+    for person_id in layer:
+        if stats is not None:
+            stats.expansions += 1
+        for movie_id, neighbor in neighbors_for_person(person_id):
+            if neighbor in visited:
+                continue
+            visited[neighbor] = (movie_id, person_id)
+            if neighbor in other_visited:
+                return neighbor, next_layer
+            next_layer.append(neighbor)
+    if stats is not None:
+        stats.frontier(len(next_layer))
+    return None, next_layer
+
+
+def join_paths(meeting, forward, backward):
+    """
+    Stitches the source half and the target half of a bidirectional
+    search together at the meeting person.
+    """
+    path = path_from_tree(forward, meeting)
+
+    person_id = meeting
+    while backward[person_id] is not None:
+        movie_id, child = backward[person_id]
+        path.append((movie_id, child))
+        person_id = child
+
+    return path
+
+
+def bfs_tree(source, depths=None):
+    """
+    Runs a full breadth-first search from source and returns a dict
+    mapping every reachable person_id to the (movie_id, person_id) step
+    it was reached from, or None for the source itself.
+
+    If depths is a dict, it is filled with the degrees of separation
+    of every reachable person_id from source.
+    """
+    parents = {source: None}
+    layer = [source]
+    depth = 0
+    while layer:
+        if depths is not None:
+            for person_id in layer:
+                depths[person_id] = depth
+        depth += 1
+        next_layer = []
+        for person_id in layer:
+            for movie_id, neighbor in neighbors_for_person(person_id):
+                if neighbor not in parents:
+                    parents[neighbor] = (movie_id, person_id)
+                    next_layer.append(neighbor)
+        layer = next_layer
+    return parents
+
+
+def cached_bfs_tree(source):
+    """
+    Returns bfs_tree(source), reusing a cached tree until ingest
+    adds rows that could change it.
+    """
+    if source in tree_cache:
+        tree_cache[source] = tree_cache.pop(source)
+    else:
+        depths = {}
+        tree_cache[source] = (bfs_tree(source, depths), depths)
+        if len(tree_cache) > TREE_CACHE_SIZE:
+            del tree_cache[next(iter(tree_cache))]
+    return tree_cache[source][0]
+
+
+def path_from_tree(parents, target):
+    """
+    Returns the list of (movie_id, person_id) pairs leading from the
+    root of a bfs_tree to target, or None if target was not reached.
+    """
+    if target not in parents:
+        return None
+    path = []
+    while parents[target] is not None:
+        movie_id, parent = parents[target]
+        path.append((movie_id, target))
+        target = parent
+    path.reverse()
+    return path
+
+
+def distance_histograms(directory, sources, processes=None):
+    """
+    Returns a dict mapping each source person_id to a dict of
+    {degrees: number of people at that many degrees}, for everyone
+    connected to the source (the source itself is counted at 0).
+
+    Sources are shared across a pool of worker processes, each reading
+    the same memory-mapped snapshot of directory.
+    """
+    sources = list(sources)
+    with worker_pool(directory, processes) as pool:
+        return dict(zip(sources, pool.map(histogram_worker, sources)))
+
+
+def paths_from_sources(directory, sources, targets, processes=None):
+    """
+    Returns a dict mapping each (source, target) person_id pair to the
+    shortest list of (movie_id, person_id) pairs connecting them, or None.
+
+    Each source is searched once, in parallel like distance_histograms.
+    """
+    sources = list(sources)
+    targets = list(targets)
+    tasks = [(source, targets) for source in sources]
+    paths = {}
+    with worker_pool(directory, processes) as pool:
+        for source, found in zip(sources, pool.map(paths_worker, tasks)):
+            for target, path in zip(targets, found):
+                paths[(source, target)] = path
+    return paths
+
+
+def worker_pool(directory, processes):
+    """
+    Returns a process pool whose workers each load the graph of directory.
+    A snapshot is built first if needed, so workers map the same file
+    instead of each parsing the CSVs.
+    """
+    if not snapshot_is_fresh(directory) or read_journal(directory):
+        build_snapshot(directory)
+    return multiprocessing.Pool(processes, init_worker, (directory,))
+
+
+# Graph loaded by each worker process of worker_pool
+worker_graph = None
+
+
+def init_worker(directory):
+    global worker_graph
+    worker_graph = load_graph(directory)
+
+
+def histogram_worker(source):
+    histogram = {}
+    for distance in worker_graph.distances(worker_graph.person_index[source]):
+        if distance != UNREACHABLE:
+            histogram[distance] = histogram.get(distance, 0) + 1
+    return dict(sorted(histogram.items()))
+
+
+def paths_worker(task):
+    source, targets = task
+    s = worker_graph.person_index[source]
+    parent_person, parent_movie = worker_graph.search_tree(s)
+    paths = []
+    for target in targets:
+        t = worker_graph.person_index[target]
+        if parent_person[t] == -1:
+            paths.append(None)
+        else:
+            paths.append(worker_graph.trace_path(t, s, parent_person, parent_movie))
+    return paths
+
+
 def person_id_for_name(name):
     """
     Returns the IMDB id for a person's name,
@@ -176,11 +567,16 @@ def neighbors_for_person(person_id):
     Returns (movie_id, person_id) pairs for people
     who starred with a given person.
     """
+    if stats is not None:
+        start = time.perf_counter()
     movie_ids = people[person_id]["movies"]
     neighbors = set()
     for movie_id in movie_ids:
         for person_id in movies[movie_id]["stars"]:
             neighbors.add((movie_id, person_id))
+    if stats is not None:
+        stats.neighbor_calls += 1
+        stats.neighbor_time += time.perf_counter() - start
     return neighbors
 
 
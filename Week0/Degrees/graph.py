@@ -0,0 +1,275 @@
+from array import array
+import csv
+import os
+
+# Distance stored for people not connected to a search root
+UNREACHABLE = 255
+
+
+class Graph():
+    """
+    Compact star graph for the degrees dataset.
+
+    Person and movie ids are interned to dense ints and adjacency is
+    stored in CSR form: the movies of person p are
+    person_movies[person_offsets[p]:person_offsets[p + 1]], and the
+    stars of movie m are movie_people[movie_offsets[m]:movie_offsets[m + 1]].
+    """
+
+    def __init__(self, person_ids, movie_ids, person_offsets, person_movies,
+                 movie_offsets, movie_people):
+        self.person_ids = person_ids
+        self.movie_ids = movie_ids
+        self.person_index = {person_id: i for i, person_id in enumerate(person_ids)}
+        self.movie_index = {movie_id: i for i, movie_id in enumerate(movie_ids)}
+        self.person_offsets = person_offsets
+        self.person_movies = person_movies
+        self.movie_offsets = movie_offsets
+        self.movie_people = movie_people
+
+        # Set to a util.SearchStats to count the work done by searches
+        self.stats = None
+
+    @classmethod
+    def from_edges(cls, person_ids, movie_ids, edges):
+        """
+        Builds a graph from lists of person and movie ids and an
+        iterable of (person_index, movie_index) pairs.
+        """
+        edges = list(edges)
+        person_offsets, person_movies = build_csr(len(person_ids), edges)
+        movie_offsets, movie_people = build_csr(
+            len(movie_ids), [(m, p) for p, m in edges]
+        )
+        return cls(person_ids, movie_ids, person_offsets, person_movies,
+                   movie_offsets, movie_people)
+
+    @classmethod
+    def from_data(cls, people, movies):
+        """
+        Builds a graph from the people and movies dicts filled by
+        degrees.load_data.
+        """
+        person_ids = list(people)
+        movie_ids = list(movies)
+        person_index = {person_id: i for i, person_id in enumerate(person_ids)}
+        movie_index = {movie_id: i for i, movie_id in enumerate(movie_ids)}
+        edges = [
+            (person_index[person_id], movie_index[movie_id])
+            for person_id in person_ids
+            for movie_id in people[person_id]["movies"]
+        ]
+        return cls.from_edges(person_ids, movie_ids, edges)
+
+    @classmethod
+    def from_snapshot(cls, snapshot):
+        """
+        Builds a graph over the memory-mapped arrays returned by
+        snapshot.read_snapshot, without copying them.
+        """
+        return cls(snapshot["person_ids"], snapshot["movie_ids"],
+                   snapshot["person_offsets"], snapshot["person_movies"],
+                   snapshot["movie_offsets"], snapshot["movie_people"])
+
+    @property
+    def num_people(self):
+        return len(self.person_ids)
+
+    @property
+    def num_movies(self):
+        return len(self.movie_ids)
+
+    def movies_for(self, person):
+        """
+        Returns the movie indices of a person index.
+        """
+        return self.person_movies[
+            self.person_offsets[person]:self.person_offsets[person + 1]
+        ]
+
+    def stars_for(self, movie):
+        """
+        Returns the person indices of a movie index.
+        """
+        return self.movie_people[
+            self.movie_offsets[movie]:self.movie_offsets[movie + 1]
+        ]
+
+    def neighbors(self, person):
+        """
+        Yields (movie_index, person_index) pairs for people
+        who starred with a given person index.
+        """
+        for movie in self.movies_for(person):
+            for other in self.stars_for(movie):
+                yield movie, other
+
+    def degree(self, person):
+        """
+        Returns the total cast size of the movies of a person index,
+        an upper bound on how many co-stars they have.
+        """
+        return sum(
+            self.movie_offsets[movie + 1] - self.movie_offsets[movie]
+            for movie in self.movies_for(person)
+        )
+
+    def distances(self, source):
+        """
+        Returns a bytearray of breadth-first distances in degrees from
+        the source person index to every person index, with UNREACHABLE
+        for people not connected to the source.
+        """
+        distance = bytearray([UNREACHABLE]) * self.num_people
+        movie_seen = bytearray(self.num_movies)
+        distance[source] = 0
+
+        layer = [source]
+        depth = 0
+        while layer and depth + 1 < UNREACHABLE:
+            depth += 1
+            next_layer = []
+            for person in layer:
+                for movie in self.movies_for(person):
+                    if movie_seen[movie]:
+                        continue
+                    movie_seen[movie] = 1
+                    for other in self.stars_for(movie):
+                        if distance[other] == UNREACHABLE:
+                            distance[other] = depth
+                            next_layer.append(other)
+            layer = next_layer
+        return distance
+
+    def shortest_path(self, source, target):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs
+        that connect the source to the target person ids.
+
+        If no possible path, returns None.
+        """
+        source = self.person_index[source]
+        target = self.person_index[target]
+        if source == target:
+            return []
+
+        # For each person index, the person and movie it was reached from
+        parent_person = array("i", [-1]) * self.num_people
+        parent_movie = array("i", [-1]) * self.num_people
+        movie_seen = bytearray(self.num_movies)
+        parent_person[source] = source
+
+        layer = [source]
+        while layer:
+            next_layer = []
+            for person in layer:
+                if self.stats is not None:
+                    self.stats.expansions += 1
+                for movie in self.movies_for(person):
+                    # Every star of a movie is reached the first time it is seen
+                    if movie_seen[movie]:
+                        continue
+                    movie_seen[movie] = 1
+                    for other in self.stars_for(movie):
+                        if parent_person[other] != -1:
+                            continue
+                        parent_person[other] = person
+                        parent_movie[other] = movie
+                        if other == target:
+                            return self.trace_path(
+                                target, source, parent_person, parent_movie
+                            )
+                        next_layer.append(other)
+            if self.stats is not None:
+                self.stats.frontier(len(next_layer))
+            layer = next_layer
+
+        return None
+
+    def search_tree(self, source):
+        """
+        Runs a full breadth-first search from the source person index and
+        returns (parent_person, parent_movie) arrays for use with trace_path.
+        Unreached people have a parent_person of -1.
+        """
+        parent_person = array("i", [-1]) * self.num_people
+        parent_movie = array("i", [-1]) * self.num_people
+        movie_seen = bytearray(self.num_movies)
+        parent_person[source] = source
+
+        layer = [source]
+        while layer:
+            next_layer = []
+            for person in layer:
+                for movie in self.movies_for(person):
+                    if movie_seen[movie]:
+                        continue
+                    movie_seen[movie] = 1
+                    for other in self.stars_for(movie):
+                        if parent_person[other] == -1:
+                            parent_person[other] = person
+                            parent_movie[other] = movie
+                            next_layer.append(other)
+            layer = next_layer
+        return parent_person, parent_movie
+
+    def trace_path(self, target, source, parent_person, parent_movie):
+        """
+        Follows parent arrays back from target to source and returns
+        the path as (movie_id, person_id) pairs.
+        """
+        path = []
+        person = target
+        while person != source:
+            path.append((self.movie_ids[parent_movie[person]], self.person_ids[person]))
+            person = parent_person[person]
+        path.reverse()
+        return path
+
+
+def build_csr(size, pairs):
+    """
+    Returns (offsets, values) arrays grouping the values of (key, value)
+    pairs by key, for keys in range(size).
+    """
+    offsets = array("i", [0]) * (size + 1)
+    for key, _ in pairs:
+        offsets[key + 1] += 1
+    for i in range(size):
+        offsets[i + 1] += offsets[i]
+
+    values = array("i", [0]) * len(pairs)
+    cursor = array("i", offsets[:-1])
+    for key, value in pairs:
+        values[cursor[key]] = value
+        cursor[key] += 1
+    return offsets, values
+
+
+def load_graph(directory):
+    """
+    Load a Graph straight from the CSV files, without building the
+    people and movies dicts, or from a snapshot of them if one is fresh
+    and has no journaled rows pending.
+    """
+    import snapshot  # imported here as snapshot uses build_csr from this module
+    if (snapshot.snapshot_is_fresh(directory)
+            and not os.path.exists(snapshot.journal_path(directory))):
+        return Graph.from_snapshot(snapshot.read_snapshot(directory))
+
+    with open(f"{directory}/people.csv", encoding="utf-8") as f:
+        person_ids = [row["id"] for row in csv.DictReader(f)]
+    with open(f"{directory}/movies.csv", encoding="utf-8") as f:
+        movie_ids = [row["id"] for row in csv.DictReader(f)]
+
+    person_index = {person_id: i for i, person_id in enumerate(person_ids)}
+    movie_index = {movie_id: i for i, movie_id in enumerate(movie_ids)}
+    edges = set()
+    with open(f"{directory}/stars.csv", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            try:
+                edges.add((person_index[row["person_id"]], movie_index[row["movie_id"]]))
+            except KeyError:
+                pass
+
+    return Graph.from_edges(person_ids, movie_ids, sorted(edges))
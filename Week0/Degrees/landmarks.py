@@ -0,0 +1,307 @@
+from array import array
+import mmap
+import os
+import struct
+import sys
+
+from graph import UNREACHABLE, load_graph
+from snapshot import SOURCES
+
+LANDMARKS_NAME = "degrees.landmarks"
+MAGIC = b"DEGLMRK1"
+HEADER = struct.Struct("<8sQQ")
+
+# Number of landmarks used to prune a single search
+ACTIVE_LANDMARKS = 8
+
+
+class LandmarkIndex():
+    """
+    Breadth-first distances from a set of high-degree landmark people
+    to everyone in a Graph.
+
+    By the triangle inequality, for any landmark l the separation of
+    s and t is at least |d(l, s) - d(l, t)| and at most d(l, s) + d(l, t),
+    which gives instant bounds and rules out people who cannot be on
+    a shortest path.
+    """
+
+    def __init__(self, graph, landmarks, rows):
+        self.graph = graph
+        self.landmarks = landmarks
+        self.rows = rows
+
+    @classmethod
+    def build(cls, graph, count=256):
+        """
+        Picks the count highest-degree people of graph as landmarks
+        and computes distances from each of them.
+        """
+        by_degree = sorted(range(graph.num_people), key=graph.degree, reverse=True)
+        landmarks = array("i", by_degree[:count])
+        rows = [graph.distances(landmark) for landmark in landmarks]
+        return cls(graph, landmarks, rows)
+
+    def save(self, path):
+        """
+        Writes the landmarks and their distance rows to path.
+        """
+        landmarks = array("i", self.landmarks)
+        if sys.byteorder != "little":
+            landmarks.byteswap()
+        with open(path + ".tmp", "wb") as f:
+            f.write(HEADER.pack(MAGIC, self.graph.num_people, len(landmarks)))
+            f.write(landmarks.tobytes())
+            for row in self.rows:
+                f.write(row)
+        os.replace(path + ".tmp", path)
+
+    @classmethod
+    def load(cls, graph, path):
+        """
+        Memory-maps landmark distances written by save for graph.
+        """
+        with open(path, "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, num_people, count = HEADER.unpack_from(buffer)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a landmark index")
+        if num_people != graph.num_people:
+            raise ValueError(f"{path} was built for a different graph")
+
+        view = memoryview(buffer)
+        position = HEADER.size
+        landmarks = array("i")
+        landmarks.frombytes(view[position:position + 4 * count])
+        if sys.byteorder != "little":
+            landmarks.byteswap()
+        position += 4 * count
+        rows = [
+            view[position + i * num_people:position + (i + 1) * num_people]
+            for i in range(count)
+        ]
+        return cls(graph, landmarks, rows)
+
+    def bounds(self, source, target):
+        """
+        Returns (lower, upper) bounds on the degrees of separation of
+        two person ids. Both are None if the index proves they are not
+        connected; upper is None if no landmark reaches either of them.
+        """
+        lower, upper, _ = self.bounds_for(
+            self.graph.person_index[source], self.graph.person_index[target]
+        )
+        return lower, upper
+
+    def bounds_for(self, s, t):
+        """
+        Returns (lower, upper, row) for two person indices, as bounds
+        does, with row the distances from the landmark giving upper.
+        """
+        lower = 0
+        upper = None
+        via = None
+        for row in self.rows:
+            ds, dt = row[s], row[t]
+            if ds == UNREACHABLE and dt == UNREACHABLE:
+                continue
+            if ds == UNREACHABLE or dt == UNREACHABLE:
+                return None, None, None
+            lower = max(lower, abs(ds - dt))
+            if upper is None or ds + dt < upper:
+                upper = ds + dt
+                via = row
+        return lower, upper, via
+
+    def shortest_path(self, source, target):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs
+        that connect the source to the target.
+
+        The landmarks bound the separation from both sides. When the
+        bounds meet, the path through the landmark giving the upper
+        bound is shortest and is followed directly. Otherwise a
+        bidirectional breadth-first search looks for a shorter path,
+        skipping people the landmarks show cannot be on one, and the
+        landmark path is used if it finds none.
+
+        If no possible path, returns None.
+        """
+        graph = self.graph
+        s = graph.person_index[source]
+        t = graph.person_index[target]
+        if s == t:
+            return []
+        lower, upper, via = self.bounds_for(s, t)
+        if lower is None:
+            return None
+        if lower == upper:
+            return self.landmark_path(s, t, via)
+
+        # Only keep the landmarks that give the tightest bound for this query
+        active = sorted(
+            (row for row in self.rows if row[s] != UNREACHABLE),
+            key=lambda row: abs(row[s] - row[t]),
+            reverse=True,
+        )[:ACTIVE_LANDMARKS]
+
+        # Maps person index to (movie, person) of the step towards the
+        # source (forward) or the target (backward); None for the endpoints
+        forward = {s: None}
+        backward = {t: None}
+        forward_layer = [s]
+        backward_layer = [t]
+        forward_movies = set()
+        backward_movies = set()
+        forward_depth = backward_depth = 0
+        while forward_layer and backward_layer:
+            # Any path found by another layer is no shorter than the bound
+            if upper is not None and forward_depth + backward_depth + 1 >= upper:
+                break
+            if len(forward_layer) <= len(backward_layer):
+                forward_depth += 1
+                meeting, forward_layer = self.expand_layer(
+                    forward_layer, forward, backward, forward_movies,
+                    [(row, row[t]) for row in active], upper, forward_depth
+                )
+            else:
+                backward_depth += 1
+                meeting, backward_layer = self.expand_layer(
+                    backward_layer, backward, forward, backward_movies,
+                    [(row, row[s]) for row in active], upper, backward_depth
+                )
+            if meeting is not None:
+                return self.join_paths(meeting, forward, backward)
+
+        if upper is None:
+            return None
+        return self.landmark_path(s, t, via)
+
+    def expand_layer(self, layer, visited, other_visited, movies_seen,
+                     goals, upper, depth):
+        """
+        Expands every person index in layer by one step, recording
+        parents in visited, and returns (meeting, next_layer) like
+        degrees.expand_layer.
+
+        People reached at depth who are at least upper minus depth
+        from the other end by one of the (row, distance) goals are
+        left out, as no path through them beats the landmark path.
+        """
+        graph = self.graph
+        next_layer = []
+        for person in layer:
+            if graph.stats is not None:
+                graph.stats.expansions += 1
+            for movie in graph.movies_for(person):
+                if movie in movies_seen:
+                    continue
+                movies_seen.add(movie)
+                for other in graph.stars_for(movie):
+                    if other in visited:
+                        continue
+                    if other in other_visited:
+                        visited[other] = (movie, person)
+                        return other, next_layer
+                    if upper is not None and any(
+                        abs(row[other] - goal) >= upper - depth
+                        for row, goal in goals
+                    ):
+                        continue
+                    visited[other] = (movie, person)
+                    next_layer.append(other)
+        if graph.stats is not None:
+            graph.stats.frontier(len(next_layer))
+        return None, next_layer
+
+    def join_paths(self, meeting, forward, backward):
+        """
+        Stitches the two halves of a bidirectional search together at
+        the meeting person index, returning ids as shortest_path does.
+        """
+        graph = self.graph
+        path = []
+        person = meeting
+        while forward[person] is not None:
+            movie, parent = forward[person]
+            path.append((graph.movie_ids[movie], graph.person_ids[person]))
+            person = parent
+        path.reverse()
+
+        person = meeting
+        while backward[person] is not None:
+            movie, child = backward[person]
+            path.append((graph.movie_ids[movie], graph.person_ids[child]))
+            person = child
+        return path
+
+    def landmark_path(self, s, t, row):
+        """
+        Returns a path from person index s to t through the landmark
+        whose distances are row, following co-stars one degree closer
+        to the landmark at each step.
+        """
+        graph = self.graph
+        path = [
+            (graph.movie_ids[movie], graph.person_ids[person])
+            for movie, person in self.descend(s, row)
+        ]
+        steps = self.descend(t, row)
+        people = [t] + [person for _, person in steps]
+        for (movie, _), person in zip(reversed(steps), reversed(people[:-1])):
+            path.append((graph.movie_ids[movie], graph.person_ids[person]))
+        return path
+
+    def descend(self, person, row):
+        """
+        Returns the (movie, person) index steps from person down to the
+        landmark whose distances are row.
+        """
+        graph = self.graph
+        steps = []
+        while row[person]:
+            if graph.stats is not None:
+                graph.stats.expansions += 1
+            closer = row[person] - 1
+            for movie, other in graph.neighbors(person):
+                if row[other] == closer:
+                    steps.append((movie, other))
+                    person = other
+                    break
+        return steps
+
+
+def landmarks_path(directory):
+    return os.path.join(directory, LANDMARKS_NAME)
+
+
+def load_landmarks(directory, graph=None):
+    """
+    Loads the landmark index stored in directory, building and saving
+    it first if it is missing or older than the data it was built from.
+    """
+    if graph is None:
+        graph = load_graph(directory)
+    path = landmarks_path(directory)
+    try:
+        built = os.path.getmtime(path)
+        if all(os.path.getmtime(os.path.join(directory, name)) < built
+               for name in SOURCES):
+            return LandmarkIndex.load(graph, path)
+    except (OSError, ValueError):
+        pass
+
+    index = LandmarkIndex.build(graph)
+    index.save(path)
+    return index
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 3:
+        sys.exit("Usage: python landmarks.py [directory] [count]")
+    directory = sys.argv[1] if len(sys.argv) >= 2 else "large"
+    count = int(sys.argv[2]) if len(sys.argv) == 3 else 256
+    index = LandmarkIndex.build(load_graph(directory), count)
+    index.save(landmarks_path(directory))
+    print(f"Wrote {len(index.landmarks)} landmarks to {landmarks_path(directory)}")
@@ -0,0 +1,187 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from difflib import SequenceMatcher
+import heapq
+
+# Most trigram postings a fuzzy lookup counts beyond its two rarest
+# trigrams, so that lookups stay fast however common the query's are
+FUZZY_POSTINGS = 20000
+
+# Most trigrams a fuzzy lookup counts. They are chosen so that no two
+# overlap in the query, as one typo then removes at most one of them
+# from the name that was meant.
+FUZZY_TRIGRAMS = 4
+
+
+class NameIndex():
+    """
+    Name lookups over a sorted array of lowercase names, with a
+    trigram index for fuzzy matching.
+
+    Every query may pass a birth year to disambiguate people who
+    share a name.
+    """
+
+    def __init__(self, entries):
+        """
+        Builds the index from an iterable of (person_id, name, birth).
+        """
+        entries = sorted(
+            (name.lower(), person_id, birth) for person_id, name, birth in entries
+        )
+
+        # Each name added is an entry, numbered in the order added
+        self.names = [key for key, _, _ in entries]
+        self.person_ids = [person_id for _, person_id, _ in entries]
+        self.births = [birth for _, _, birth in entries]
+
+        # Sorted lowercase names, and the entry each one belongs to
+        self.keys = list(self.names)
+        self.entries = array("i", range(len(entries)))
+
+        # Maps each trigram to the entries whose names contain it
+        self.trigrams = {}
+        for entry, key in enumerate(self.names):
+            for trigram in trigrams(key):
+                self.trigrams.setdefault(trigram, array("i")).append(entry)
+
+    @classmethod
+    def from_people(cls, people):
+        """
+        Builds the index from the people dict filled by degrees.load_data.
+        """
+        return cls(
+            (person_id, person["name"], person["birth"])
+            for person_id, person in people.items()
+        )
+
+    def add(self, person_id, name, birth):
+        """
+        Adds one person to the index without rebuilding it.
+        """
+        key = name.lower()
+        entry = len(self.names)
+        self.names.append(key)
+        self.person_ids.append(person_id)
+        self.births.append(birth)
+
+        position = bisect_right(self.keys, key)
+        self.keys.insert(position, key)
+        self.entries.insert(position, entry)
+        for trigram in trigrams(key):
+            self.trigrams.setdefault(trigram, array("i")).append(entry)
+
+    def matches_birth(self, entry, birth):
+        return birth is None or self.births[entry] == str(birth)
+
+    def exact(self, name, birth=None):
+        """
+        Returns the person_ids whose name is name, ignoring case.
+        """
+        key = name.lower()
+        position = bisect_left(self.keys, key)
+        person_ids = []
+        while position < len(self.keys) and self.keys[position] == key:
+            entry = self.entries[position]
+            if self.matches_birth(entry, birth):
+                person_ids.append(self.person_ids[entry])
+            position += 1
+        return person_ids
+
+    def prefix(self, prefix, limit=10, birth=None):
+        """
+        Returns up to limit person_ids whose name starts with prefix,
+        in alphabetical order.
+        """
+        prefix = prefix.lower()
+        position = bisect_left(self.keys, prefix)
+        person_ids = []
+        while (len(person_ids) < limit and position < len(self.keys)
+               and self.keys[position].startswith(prefix)):
+            entry = self.entries[position]
+            if self.matches_birth(entry, birth):
+                person_ids.append(self.person_ids[entry])
+            position += 1
+        return person_ids
+
+    def fuzzy(self, name, limit=10, birth=None, candidates=50):
+        """
+        Returns up to limit (score, person_id) pairs for the names most
+        similar to name, best first, with scores between 0 and 1.
+
+        Only a few of the rarest trigrams of name are counted (see
+        FUZZY_TRIGRAMS and FUZZY_POSTINGS) rather than every posting
+        of every trigram, as common trigrams like " jo" touch a large
+        share of all names. The names sharing the most of them are
+        shortlisted, then ranked by edit similarity.
+        """
+        key = name.lower()
+        padded = f"  {key} "
+        starts = sorted(
+            (i for i in range(len(padded) - 2) if padded[i:i + 3] in self.trigrams),
+            key=lambda i: len(self.trigrams[padded[i:i + 3]])
+        )
+        chosen = []
+        shared = Counter()
+        budget = FUZZY_POSTINGS
+        for start in starts:
+            if any(abs(start - other) < 3 for other in chosen):
+                continue
+            postings = self.trigrams[padded[start:start + 3]]
+            if len(chosen) >= 2:
+                if len(postings) > budget:
+                    break
+                budget -= len(postings)
+            chosen.append(start)
+            shared.update(postings)
+            if len(chosen) == FUZZY_TRIGRAMS:
+                break
+
+        if birth is not None:
+            birth = str(birth)
+            shared = {
+                entry: count for entry, count in shared.items()
+                if self.births[entry] == birth
+            }
+        shortlist = heapq.nlargest(candidates, shared, key=shared.get)
+
+        # As in difflib.get_close_matches, cheap upper bounds on the
+        # similarity skip names that cannot make the best limit
+        matcher = SequenceMatcher()
+        matcher.set_seq2(key)
+        best = []
+        for entry in shortlist:
+            matcher.set_seq1(self.names[entry])
+            cutoff = best[0][0] if len(best) == limit else 0
+            if (matcher.real_quick_ratio() > cutoff
+                    and matcher.quick_ratio() > cutoff):
+                score = matcher.ratio()
+                if score > cutoff:
+                    pair = (score, self.person_ids[entry])
+                    if len(best) == limit:
+                        heapq.heapreplace(best, pair)
+                    else:
+                        heapq.heappush(best, pair)
+
+        best.sort(key=lambda pair: pair[0], reverse=True)
+        return best
+
+    def resolve(self, name, birth=None):
+        """
+        Returns the person_id for a name without prompting: the exact
+        match if there is only one, otherwise None.
+        """
+        person_ids = self.exact(name, birth)
+        if len(person_ids) == 1:
+            return person_ids[0]
+        return None
+
+
+def trigrams(key):
+    """
+    Returns the set of trigrams of a lowercase name, padded so
+    that short names and word boundaries are represented.
+    """
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
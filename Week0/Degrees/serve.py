@@ -0,0 +1,95 @@
+import json
+import sys
+
+import degrees
+from degrees import (
+    load_data, ingest, new_rows, tree_cache, cached_bfs_tree, path_from_tree,
+    shortest_path
+)
+from name_index import NameIndex
+
+# Built once the data is loaded, then updated as people are ingested
+name_index = None
+
+
+def resolve(person):
+    """
+    Returns the person_id for a query field, which may be a person_id,
+    an unambiguous name, or {"name": ..., "birth": ...}.
+    """
+    if isinstance(person, dict):
+        return name_index.resolve(person["name"], person.get("birth"))
+    if person in degrees.people:
+        return person
+    return name_index.resolve(person)
+
+
+def answer(queries):
+    """
+    Answers a list of (source, target) queries, returning one result
+    dict per query in the same order.
+
+    Sources shared by several queries, or already cached, get one full
+    BFS tree that answers all of them; other queries use shortest_path.
+    """
+    resolved = [(resolve(source), resolve(target)) for source, target in queries]
+    counts = {}
+    for source, target in resolved:
+        if source is not None and target is not None:
+            counts[source] = counts.get(source, 0) + 1
+
+    results = []
+    for (source, target), (source_query, target_query) in zip(resolved, queries):
+        result = {"source": source_query, "target": target_query}
+        if source is None or target is None:
+            result["error"] = "person not found or ambiguous"
+            results.append(result)
+            continue
+
+        if counts[source] > 1 or source in tree_cache:
+            path = path_from_tree(cached_bfs_tree(source), target)
+        else:
+            path = shortest_path(source, target, bidirectional=True)
+
+        result["degrees"] = None if path is None else len(path)
+        result["path"] = path
+        results.append(result)
+    return results
+
+
+def main():
+    if len(sys.argv) > 2:
+        sys.exit("Usage: python serve.py [directory]")
+    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+
+    # Load data once, then answer queries until stdin is closed
+    global name_index
+    load_data(directory)
+    name_index = NameIndex.from_people(degrees.people)
+    print(json.dumps({"ready": True}), flush=True)
+
+    # Each line is {"source": ..., "target": ...},
+    # {"queries": [[source, target], ...]}, or {"ingest": rows} to add
+    # rows to the data as described by degrees.ingest
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        try:
+            request = json.loads(line)
+            if "ingest" in request:
+                rows = new_rows(request["ingest"])
+                invalidated = ingest(rows, directory)
+                for row in rows["people"]:
+                    name_index.add(row["id"], row["name"], row["birth"])
+                response = {"invalidated": sorted(invalidated)}
+            elif "queries" in request:
+                response = {"results": answer(request["queries"])}
+            else:
+                response = answer([(request["source"], request["target"])])[0]
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            response = {"error": f"bad request: {e}"}
+        print(json.dumps(response), flush=True)
+
+
+if __name__ == "__main__":
+    main()
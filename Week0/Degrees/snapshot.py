@@ -0,0 +1,301 @@
+from array import array
+from collections.abc import MutableMapping
+import csv
+import json
+import mmap
+import os
+import struct
+import sys
+
+from graph import build_csr
+
+SNAPSHOT_NAME = "degrees.snapshot"
+JOURNAL_NAME = "degrees.snapshot.journal"
+MAGIC = b"DEGSNAP1"
+
+# String columns are stored as "\0"-terminated UTF-8, int columns as int32 arrays
+STRING_COLUMNS = [
+    "person_ids", "person_names", "person_births",
+    "movie_ids", "movie_titles", "movie_years",
+]
+INT_COLUMNS = [
+    "person_offsets", "person_movies", "movie_offsets", "movie_people",
+]
+HEADER = struct.Struct("<8s" + "Q" * (len(STRING_COLUMNS) + len(INT_COLUMNS)))
+ALIGNMENT = 8
+
+SOURCES = ["people.csv", "movies.csv", "stars.csv"]
+
+
+def snapshot_path(directory):
+    return os.path.join(directory, SNAPSHOT_NAME)
+
+
+def journal_path(directory):
+    return os.path.join(directory, JOURNAL_NAME)
+
+
+def snapshot_is_fresh(directory):
+    """
+    Returns True if a snapshot exists in directory and, together with
+    its journal of ingested rows, is newer than every CSV file.
+    """
+    try:
+        built = os.path.getmtime(snapshot_path(directory))
+        if os.path.exists(journal_path(directory)):
+            built = max(built, os.path.getmtime(journal_path(directory)))
+        return all(
+            os.path.getmtime(os.path.join(directory, name)) < built
+            for name in SOURCES
+        )
+    except OSError:
+        return False
+
+
+def build_snapshot(directory):
+    """
+    Parses the CSV files in directory and writes a binary snapshot
+    of them next to the sources. Returns the snapshot path.
+    """
+    columns = {name: [] for name in STRING_COLUMNS}
+
+    with open(f"{directory}/people.csv", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            columns["person_ids"].append(row["id"])
+            columns["person_names"].append(row["name"])
+            columns["person_births"].append(row["birth"])
+
+    with open(f"{directory}/movies.csv", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            columns["movie_ids"].append(row["id"])
+            columns["movie_titles"].append(row["title"])
+            columns["movie_years"].append(row["year"])
+
+    person_index = {person_id: i for i, person_id in enumerate(columns["person_ids"])}
+    movie_index = {movie_id: i for i, movie_id in enumerate(columns["movie_ids"])}
+    edges = set()
+    with open(f"{directory}/stars.csv", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            try:
+                edges.add((person_index[row["person_id"]], movie_index[row["movie_id"]]))
+            except KeyError:
+                pass
+    edges = sorted(edges)
+
+    person_offsets, person_movies = build_csr(len(person_index), edges)
+    movie_offsets, movie_people = build_csr(
+        len(movie_index), sorted((m, p) for p, m in edges)
+    )
+    arrays = [person_offsets, person_movies, movie_offsets, movie_people]
+    for values in arrays:
+        if sys.byteorder != "little":
+            values.byteswap()
+
+    sections = [
+        "".join(value + "\0" for value in columns[name]).encode("utf-8")
+        for name in STRING_COLUMNS
+    ] + [values.tobytes() for values in arrays]
+
+    # Write to a temporary file first so readers never see a partial snapshot
+    path = snapshot_path(directory)
+    with open(path + ".tmp", "wb") as f:
+        f.write(HEADER.pack(MAGIC, *(len(section) for section in sections)))
+        for section in sections:
+            f.write(pad(f.tell()))
+            f.write(section)
+    os.replace(path + ".tmp", path)
+
+    # The new snapshot already contains every journaled row
+    if os.path.exists(journal_path(directory)):
+        os.remove(journal_path(directory))
+    return path
+
+
+def pad(position):
+    return b"\0" * (-position % ALIGNMENT)
+
+
+def read_snapshot(directory):
+    """
+    Memory-maps the snapshot in directory and returns a dict holding
+    each string column as a StringColumn and each int column as an
+    int32 memoryview over the mapping.
+    """
+    with open(snapshot_path(directory), "rb") as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    magic, *lengths = HEADER.unpack_from(buffer)
+    if magic != MAGIC:
+        raise ValueError(f"{snapshot_path(directory)} is not a degrees snapshot")
+
+    view = memoryview(buffer)
+    snapshot = {}
+    position = HEADER.size
+    for name, length in zip(STRING_COLUMNS + INT_COLUMNS, lengths):
+        position += len(pad(position))
+        section = view[position:position + length]
+        if name in STRING_COLUMNS:
+            snapshot[name] = StringColumn(section)
+        elif sys.byteorder == "little":
+            snapshot[name] = section.cast("i")
+        else:
+            values = array("i")
+            values.frombytes(section)
+            values.byteswap()
+            snapshot[name] = values
+        position += length
+    return snapshot
+
+
+class StringColumn():
+    """
+    Sequence of the strings of a snapshot section, which are only
+    decoded the first time one of them is used.
+    """
+
+    def __init__(self, section):
+        self.section = section
+        self.values = None
+
+    def strings(self):
+        if self.values is None:
+            self.values = str(self.section, "utf-8").split("\0")[:-1]
+        return self.values
+
+    def __getitem__(self, i):
+        return self.strings()[i]
+
+    def __len__(self):
+        return len(self.strings())
+
+    def __iter__(self):
+        return iter(self.strings())
+
+
+class SnapshotRecords(MutableMapping):
+    """
+    Dict of the people or movies of a snapshot keyed by id, holding the
+    same records as degrees.load_data builds from the CSV files.
+
+    Each record is only built from the memory-mapped columns the first
+    time it is looked up, and is kept afterwards so that it can be
+    updated in place. fields maps record keys to string columns, and
+    the record key link_field holds the ids in link_ids of the rows
+    linked to it in the CSR arrays offsets and links.
+    """
+
+    def __init__(self, ids, fields, link_field, offsets, links, link_ids):
+        self.ids = ids
+        self.fields = fields
+        self.link_field = link_field
+        self.offsets = offsets
+        self.links = links
+        self.link_ids = link_ids
+
+        # Maps ids to their row in the snapshot, built on first use
+        self.rows = None
+
+        # Records already built, including those added since loading
+        self.records = {}
+        self.added = set()
+
+    def snapshot_rows(self):
+        if self.rows is None:
+            self.rows = {key: i for i, key in enumerate(self.ids)}
+        return self.rows
+
+    def __getitem__(self, key):
+        record = self.records.get(key)
+        if record is None:
+            i = self.snapshot_rows()[key]
+            record = {field: column[i] for field, column in self.fields.items()}
+            record[self.link_field] = {
+                self.link_ids[link]
+                for link in self.links[self.offsets[i]:self.offsets[i + 1]]
+            }
+            self.records[key] = record
+        return record
+
+    def __setitem__(self, key, record):
+        if key not in self:
+            self.added.add(key)
+        self.records[key] = record
+
+    def __delitem__(self, key):
+        if key in self.added:
+            self.added.remove(key)
+        else:
+            del self.snapshot_rows()[key]
+        self.records.pop(key, None)
+
+    def __contains__(self, key):
+        return key in self.records or key in self.snapshot_rows()
+
+    def __iter__(self):
+        yield from self.snapshot_rows()
+        yield from self.added
+
+    def __len__(self):
+        return len(self.snapshot_rows()) + len(self.added)
+
+
+class SnapshotNames(MutableMapping):
+    """
+    Dict mapping lowercase names to sets of person_ids, like the names
+    dict of degrees.load_data, built from the snapshot columns the first
+    time it is used.
+    """
+
+    def __init__(self, person_ids, person_names):
+        self.person_ids = person_ids
+        self.person_names = person_names
+        self.names = None
+
+    def built(self):
+        if self.names is None:
+            self.names = {}
+            for person_id, name in zip(self.person_ids, self.person_names):
+                self.names.setdefault(name.lower(), set()).add(person_id)
+        return self.names
+
+    def __getitem__(self, name):
+        return self.built()[name]
+
+    def __setitem__(self, name, person_ids):
+        self.built()[name] = person_ids
+
+    def __delitem__(self, name):
+        del self.built()[name]
+
+    def __iter__(self):
+        return iter(self.built())
+
+    def __len__(self):
+        return len(self.built())
+
+
+def append_journal(directory, rows):
+    """
+    Records a batch of ingested rows, a dict of "people", "movies" and
+    "stars" lists, as one JSON line in the journal of the snapshot.
+    """
+    with open(journal_path(directory), "a", encoding="utf-8") as f:
+        f.write(json.dumps(rows) + "\n")
+
+
+def read_journal(directory):
+    """
+    Returns the batches of rows recorded by append_journal, oldest first.
+    """
+    try:
+        with open(journal_path(directory), encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+    except FileNotFoundError:
+        return []
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2:
+        sys.exit("Usage: python snapshot.py [directory]")
+    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+    print(f"Wrote {build_snapshot(directory)}")
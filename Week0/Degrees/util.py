@@ -1,3 +1,6 @@
+from collections import deque
+
+
 class Node():
     def __init__(self, state, parent, action):
         self.state = state
@@ -36,3 +39,61 @@ class QueueFrontier(StackFrontier):
             node = self.frontier[0]
             self.frontier = self.frontier[1:]
             return node
+
+
+class IndexedQueueFrontier():
+    """
+    FIFO frontier backed by a deque, with a companion count of the states
+    it holds so that add, remove and contains_state are all O(1).
+    """
+
+    def __init__(self):
+        self.frontier = deque()
+        self.states = {}
+
+    def add(self, node):
+        self.frontier.append(node)
+        self.states[node.state] = self.states.get(node.state, 0) + 1
+
+    def contains_state(self, state):
+        return state in self.states
+
+    def empty(self):
+        return len(self.frontier) == 0
+
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        else:
+            node = self.frontier.popleft()
+            count = self.states[node.state] - 1
+            if count:
+                self.states[node.state] = count
+            else:
+                del self.states[node.state]
+            return node
+
+
+class SearchStats():
+    """
+    Opt-in counters filled in by searches that are given one.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.searches = 0
+        self.expansions = 0
+        self.frontier_peak = 0
+        self.neighbor_calls = 0
+        self.neighbor_time = 0.0
+
+    def frontier(self, size):
+        if size > self.frontier_peak:
+            self.frontier_peak = size
+
+    def __str__(self):
+        return (f"{self.searches} searches, {self.expansions} expansions, "
+                f"frontier peak {self.frontier_peak}, "
+                f"{self.neighbor_calls} neighbor calls in {self.neighbor_time:.3f}s")
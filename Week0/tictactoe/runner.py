@@ -1,5 +1,7 @@
+from concurrent.futures import ThreadPoolExecutor
 import pygame
 import sys
+import threading
 import time
 
 import tictactoe as ttt
@@ -19,12 +21,27 @@ moveFont = pygame.font.Font("OpenSans-Regular.ttf", 60)
 
 user = None
 board = ttt.initial_state()
-ai_turn = False
+
+# The AI searches on worker threads so the window keeps drawing;
+# ai_move is the pending search, stopped through ai_cancel if the
+# game is reset or the window closed
+executor = ThreadPoolExecutor()
+ai_move = None
+ai_cancel = None
+ai_started = 0
+
+# Solved positions are kept for the whole session, and looked up
+# in the opening book first when it has been generated
+transpositions = ttt.TranspositionTable()
+book = ttt.load_book()
 
 while True:
 
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
+            if ai_cancel is not None:
+                ai_cancel.set()
+            executor.shutdown(wait=False, cancel_futures=True)
             sys.exit()
 
     screen.fill(black)
@@ -108,15 +125,16 @@ while True:
         titleRect.center = ((width / 2), 30)
         screen.blit(title, titleRect)
 
-        # Check for AI move
+        # Check for AI move, shown no sooner than half a second after it started
         if user != player and not game_over:
-            if ai_turn:
-                time.sleep(0.5)
-                move = ttt.minimax(board)
-                board = ttt.result(board, move)
-                ai_turn = False
-            else:
-                ai_turn = True
+            if ai_move is None:
+                ai_cancel = threading.Event()
+                ai_move = executor.submit(ttt.minimax, board, table=transpositions,
+                                          book=book, cancel=ai_cancel)
+                ai_started = time.time()
+            elif ai_move.done() and time.time() - ai_started >= 0.5:
+                board = ttt.result(board, ai_move.result())
+                ai_move = None
 
         # Check for a user move
         click, _, _ = pygame.mouse.get_pressed()
@@ -141,6 +159,8 @@ while True:
                     time.sleep(0.2)
                     user = None
                     board = ttt.initial_state()
-                    ai_turn = False
+                    if ai_move is not None:
+                        ai_cancel.set()
+                        ai_move = None
 
     pygame.display.flip()
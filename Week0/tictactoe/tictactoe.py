@@ -1,20 +1,77 @@
 """
 Tic Tac Toe Player
 """
+from collections import OrderedDict
 from copy import deepcopy
+from functools import lru_cache
 import math
+import os
+import time
 
 X = "X"
 O = "O"
 EMPTY = None
 
-def initial_state():
+# Number of positions visited by the searches below, for benchmarking
+nodes_searched = 0
+
+# Seconds iterative deepening may spend on a move if not told otherwise
+DEFAULT_TIME_LIMIT = 1.0
+
+# Order in which alpha-beta search tries moves: center, corners, edges
+MOVE_ORDER = [(1, 1), (0, 0), (0, 2), (2, 0), (2, 2), (0, 1), (1, 0), (1, 2), (2, 1)]
+
+# Opening book of every reachable position, built by running this module
+BOOK_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "book.bin")
+NOT_IN_BOOK = 255
+
+# Bitboard masks: one bit per cell, numbered 3 * i + j
+FULL = 0b111111111
+WIN_MASKS = [
+    0b000000111, 0b000111000, 0b111000000,
+    0b001001001, 0b010010010, 0b100100100,
+    0b100010001, 0b001010100,
+]
+ORDER_BITS = [1 << (3 * i + j) for i, j in MOVE_ORDER]
+
+# The 8 rotations and reflections of the board, each as the row-major
+# cell index that every cell of the transformed board is taken from
+SYMMETRIES = [
+    [0, 1, 2, 3, 4, 5, 6, 7, 8],
+    [6, 3, 0, 7, 4, 1, 8, 5, 2],
+    [8, 7, 6, 5, 4, 3, 2, 1, 0],
+    [2, 5, 8, 1, 4, 7, 0, 3, 6],
+    [2, 1, 0, 5, 4, 3, 8, 7, 6],
+    [6, 7, 8, 3, 4, 5, 0, 1, 2],
+    [0, 3, 6, 1, 4, 7, 2, 5, 8],
+    [8, 5, 2, 7, 4, 1, 6, 3, 0],
+]
+
+class SearchTimeout(Exception):
+    pass
+
+
+def initial_state(rows=3, columns=3):
     """
-    Returns starting state of the board.
+    Returns starting state of the board, 3x3 unless rows and columns are given.
     """
-    return [[EMPTY, EMPTY, EMPTY],
-            [EMPTY, EMPTY, EMPTY],
-            [EMPTY, EMPTY, EMPTY]]
+    return [[EMPTY] * columns for _ in range(rows)]
+
+
+@lru_cache(maxsize=None)
+def winning_lines(rows, columns, k):
+    """
+    Returns every line of k cells (i, j) in a row, column or diagonal
+    of a rows x columns board.
+    """
+    lines = []
+    for i in range(rows):
+        for j in range(columns):
+            for di, dj in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                end_i, end_j = i + di * (k - 1), j + dj * (k - 1)
+                if 0 <= end_i < rows and 0 <= end_j < columns:
+                    lines.append(tuple((i + di * n, j + dj * n) for n in range(k)))
+    return lines
 
 def player(board):
     """
@@ -70,39 +127,55 @@ def result(board, action):
 
     return result_board
 
-def winner(board):
+def winner(board, k=3):
     """
-    Returns the winner of the game, if there is one.
+    Returns the winner of the game, if there is one: the player
+    with k marks in a row, column or diagonal.
     """
-    # Check for winners(if any) : Rows
-    for row in board:
-        if(row[0] != None):
-            if((row[0] == row[1]) and (row[2] == row[1])):
-                return row[0]
-    
-    # Check for winners(if any) : Columns
-    for i in range(3):
-        if(board[i][0] != None):
-            if((board[i][0] == board[i][1]) and (board[i][2] == board[i][1])):
-                return board[i][0]
-
-    # Check for winners(if any) : Diagonal 1
-    if(board[0][0] != None):
-        if((board[0][0] == board[1][1]) and (board[2][2] == board[1][1])):
-            return board[0][0]
-
-    # Check for winners(if any) : Diagonal 2
-    if(board[0][2] != None):
-        if((board[0][2] == board[1][1]) and (board[2][0] == board[1][1])):
-            return board[0][2]
-    
+    # The classic 3x3 board is checked by hand, as searches call this at every node
+    if(k == 3 and len(board) == 3 and len(board[0]) == 3):
+        # Check for winners(if any) : Rows
+        for row in board:
+            if(row[0] != None):
+                if((row[0] == row[1]) and (row[2] == row[1])):
+                    return row[0]
+
+        # Check for winners(if any) : Columns
+        for i in range(3):
+            if(board[0][i] != None):
+                if((board[0][i] == board[1][i]) and (board[2][i] == board[1][i])):
+                    return board[0][i]
+
+        # Check for winners(if any) : Diagonal 1
+        if(board[0][0] != None):
+            if((board[0][0] == board[1][1]) and (board[2][2] == board[1][1])):
+                return board[0][0]
+
+        # Check for winners(if any) : Diagonal 2
+        if(board[0][2] != None):
+            if((board[0][2] == board[1][1]) and (board[2][0] == board[1][1])):
+                return board[0][2]
+
+        return None
+
+    for line in winning_lines(len(board), len(board[0]), k):
+        i, j = line[0]
+        first = board[i][j]
+        if(first == None):
+            continue
+        for i, j in line:
+            if(board[i][j] != first):
+                break
+        else:
+            return first
+
     return None
 
-def terminal(board):
+def terminal(board, k=3):
     """
     Returns True if game is over, False otherwise.
     """
-    if(winner(board) != None):
+    if(winner(board, k) != None):
         return True
 
     for row in board:
@@ -112,11 +185,11 @@ def terminal(board):
     # If no possible moves, return True
     return True
 
-def utility(board):
+def utility(board, k=3):
     """
     Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
     """
-    value = winner(board)
+    value = winner(board, k)
     if(value == 'X'):
         return 1
     elif(value == 'O'):
@@ -124,44 +197,517 @@ def utility(board):
     else:
         return 0
 
-def min_value(board):
+def min_value(board, cancel=None):
+    global nodes_searched
+    nodes_searched += 1
+    if cancel is not None and cancel.is_set():
+        raise SearchTimeout
     best_move = ()
     if(terminal(board) == True):
         return utility(board), best_move
     else:
         limit = 5
         for action in actions(board):
-            max = max_value(result(board, action))[0]
+            max = max_value(result(board, action), cancel)[0]
             if max < limit:
                 limit = max
                 best_move = action
     return limit, best_move
 
 
-def max_value(board):
+def max_value(board, cancel=None):
+    global nodes_searched
+    nodes_searched += 1
+    if cancel is not None and cancel.is_set():
+        raise SearchTimeout
     best_move = ()
     if(terminal(board) == True):
         return utility(board), best_move
     else:
         limit = -5
         for action in actions(board):
-            min = min_value(result(board, action))[0]
+            min = min_value(result(board, action), cancel)[0]
             if min > limit:
                 limit = min
                 best_move = action
     return limit, best_move
 
 
-def minimax(board):
+def ordered_actions(board):
+    """
+    Returns the available actions on the board, most promising first:
+    on 3x3 the center, then corners, then edges; on other boards the
+    cells closest to the center first.
+    """
+    rows, columns = len(board), len(board[0])
+    if rows == 3 and columns == 3:
+        order = MOVE_ORDER
+    else:
+        order = central_order(rows, columns)
+    return [action for action in order if board[action[0]][action[1]] == EMPTY]
+
+
+@lru_cache(maxsize=None)
+def central_order(rows, columns):
+    center_i, center_j = (rows - 1) / 2, (columns - 1) / 2
+    return sorted(
+        ((i, j) for i in range(rows) for j in range(columns)),
+        key=lambda cell: abs(cell[0] - center_i) + abs(cell[1] - center_j),
+    )
+
+
+def evaluate(board, k=3):
+    """
+    Returns a heuristic value of a non-terminal board, strictly between
+    -1 and 1, from X's point of view.
+
+    Every line of k cells that only one player has marks in counts
+    for that player, more so the more marks it holds.
+    """
+    score = 0
+    for line in winning_lines(len(board), len(board[0]), k):
+        x_count = o_count = 0
+        for i, j in line:
+            if board[i][j] == X:
+                x_count += 1
+            elif board[i][j] == O:
+                o_count += 1
+        if o_count == 0 and x_count:
+            score += 4 ** x_count
+        elif x_count == 0 and o_count:
+            score -= 4 ** o_count
+    return score / (abs(score) + 4 ** k)
+
+
+def depth_limited_value(board, k, depth, alpha, beta, deadline, cancel=None):
+    """
+    Returns the alpha-beta value of the board searched depth moves
+    ahead, using evaluate at the horizon.
+
+    Raises SearchTimeout once the deadline from time.monotonic() passes,
+    or once the event cancel is set.
+    """
+    global nodes_searched
+    nodes_searched += 1
+    if time.monotonic() > deadline or (cancel is not None and cancel.is_set()):
+        raise SearchTimeout
+    if(winner(board, k) != None):
+        return utility(board, k)
+    moves = ordered_actions(board)
+    if not moves:
+        return 0
+    if depth == 0:
+        return evaluate(board, k)
+
+    if(player(board) == X):
+        value = -2
+        for action in moves:
+            value = max(value, depth_limited_value(
+                result(board, action), k, depth - 1, alpha, beta, deadline,
+                cancel))
+            alpha = max(alpha, value)
+            if alpha >= beta:
+                break
+    else:
+        value = 2
+        for action in moves:
+            value = min(value, depth_limited_value(
+                result(board, action), k, depth - 1, alpha, beta, deadline,
+                cancel))
+            beta = min(beta, value)
+            if alpha >= beta:
+                break
+    return value
+
+
+def iterative_deepening(board, k=3, time_limit=1.0, cancel=None):
+    """
+    Returns the best action found by depth-limited alpha-beta searches
+    of increasing depth within time_limit seconds, for boards of any
+    size with k in a row to win.
+
+    Each depth searches the previous depth's best move first; the
+    result of the deepest completed search is returned. If the search
+    is cancelled, SearchTimeout is raised instead.
+    """
+    deadline = time.monotonic() + time_limit
+    maximizing = player(board) == X
+    moves = ordered_actions(board)
+    best_move = moves[0]
+
+    for depth in range(len(moves)):
+        best = -2 if maximizing else 2
+        alpha, beta = -2, 2
+        try:
+            for action in moves:
+                value = depth_limited_value(
+                    result(board, action), k, depth, alpha, beta, deadline, cancel)
+                if maximizing and value > best:
+                    best, move, alpha = value, action, value
+                elif not maximizing and value < best:
+                    best, move, beta = value, action, value
+        except SearchTimeout:
+            if cancel is not None and cancel.is_set():
+                raise
+            break
+
+        best_move = move
+        moves.remove(move)
+        moves.insert(0, move)
+
+        # A forced win or loss will not change with more depth
+        if abs(best) == 1:
+            break
+    return best_move
+
+
+def alpha_beta_value(board, alpha, beta, cancel=None):
+    """
+    Returns the minimax value of the board, searching only moves that
+    can still change the outcome given the window (alpha, beta).
+    """
+    global nodes_searched
+    nodes_searched += 1
+    if cancel is not None and cancel.is_set():
+        raise SearchTimeout
+    if(terminal(board) == True):
+        return utility(board)
+
+    if(player(board) == X):
+        value = -5
+        for action in ordered_actions(board):
+            value = max(value, alpha_beta_value(result(board, action), alpha, beta, cancel))
+            alpha = max(alpha, value)
+            if alpha >= beta:
+                break
+    else:
+        value = 5
+        for action in ordered_actions(board):
+            value = min(value, alpha_beta_value(result(board, action), alpha, beta, cancel))
+            beta = min(beta, value)
+            if alpha >= beta:
+                break
+    return value
+
+
+def alpha_beta_move(board, cancel=None):
+    """
+    Returns the optimal action for the current player using alpha-beta
+    pruning, stopping as soon as a forced win is found.
+
+    Root moves are tried in the same order as max_value and min_value,
+    so ties are broken the same way and the same move is returned.
+    """
+    maximizing = player(board) == X
+    best = -5 if maximizing else 5
+    best_move = ()
+    alpha, beta = -1, 1
+    for action in actions(board):
+        value = alpha_beta_value(result(board, action), alpha, beta, cancel)
+        if maximizing and value > best:
+            best, best_move, alpha = value, action, value
+        elif not maximizing and value < best:
+            best, best_move, beta = value, action, value
+        if best == (1 if maximizing else -1):
+            break
+    return best_move
+
+
+class TranspositionTable():
+    """
+    Cache of exact minimax values keyed by canonical board encoding,
+    so a position and its 7 rotations and reflections share one entry.
+
+    If maxsize is given, the least recently used entries are evicted
+    once the table holds more than maxsize positions.
+    """
+
+    def __init__(self, maxsize=None):
+        self.maxsize = maxsize
+        self.values = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        value = self.values.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            if self.maxsize is not None:
+                self.values.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        self.values[key] = value
+        if self.maxsize is not None and len(self.values) > self.maxsize:
+            self.values.popitem(last=False)
+
+    def __len__(self):
+        return len(self.values)
+
+
+def encode(board):
+    """
+    Returns the board as a base-3 integer, one digit per cell in row-major
+    order: 0 for EMPTY, 1 for X, 2 for O.
+    """
+    code = 0
+    for row in board:
+        for cell in row:
+            code = code * 3 + (0 if cell == EMPTY else 1 if cell == X else 2)
+    return code
+
+
+def canonical(board):
+    """
+    Returns the smallest encoding among the 8 symmetries of the board.
+    """
+    cells = [cell for row in board for cell in row]
+    return min(
+        encode([[cells[permutation[3 * i + j]] for j in range(3)] for i in range(3)])
+        for permutation in SYMMETRIES
+    )
+
+
+def cached_value(board, table, cancel=None):
+    """
+    Returns the exact minimax value of the board, looking positions
+    up in the transposition table before searching them.
+    """
+    global nodes_searched
+    nodes_searched += 1
+    if cancel is not None and cancel.is_set():
+        raise SearchTimeout
+    if(terminal(board) == True):
+        return utility(board)
+
+    key = canonical(board)
+    value = table.get(key)
+    if value is not None:
+        return value
+
+    children = [
+        cached_value(result(board, action), table, cancel) for action in actions(board)
+    ]
+    value = max(children) if player(board) == X else min(children)
+    table.put(key, value)
+    return value
+
+
+def cached_move(board, table, cancel=None):
+    """
+    Returns the optimal action for the current player using cached
+    values, breaking ties in the same order as max_value and min_value.
+    """
+    maximizing = player(board) == X
+    best = -5 if maximizing else 5
+    best_move = ()
+    for action in actions(board):
+        value = cached_value(result(board, action), table, cancel)
+        if (maximizing and value > best) or (not maximizing and value < best):
+            best, best_move = value, action
+    return best_move
+
+
+def to_bitboard(board):
+    """
+    Returns the board as a pair of 9-bit masks (x, o), where bit 3 * i + j
+    is set if X, respectively O, has played at (i, j).
+    """
+    x = o = 0
+    for i in range(3):
+        for j in range(3):
+            if board[i][j] == X:
+                x |= 1 << (3 * i + j)
+            elif board[i][j] == O:
+                o |= 1 << (3 * i + j)
+    return x, o
+
+
+def from_bitboard(x, o):
+    """
+    Returns the list-of-lists board for a pair of masks from to_bitboard.
+    """
+    return [[X if x >> (3 * i + j) & 1 else O if o >> (3 * i + j) & 1 else EMPTY
+             for j in range(3)]
+            for i in range(3)]
+
+
+def bit_winner(x, o):
+    """
+    Returns the winner of a bitboard position, if there is one.
+    """
+    for mask in WIN_MASKS:
+        if x & mask == mask:
+            return X
+        if o & mask == mask:
+            return O
+    return None
+
+
+def bit_value(x, o, x_to_move, alpha, beta, cancel=None):
+    """
+    Returns the minimax value of a bitboard position with alpha-beta
+    pruning, using only integer operations and no board copies.
+    """
+    global nodes_searched
+    nodes_searched += 1
+    if cancel is not None and cancel.is_set():
+        raise SearchTimeout
+    for mask in WIN_MASKS:
+        if x & mask == mask:
+            return 1
+        if o & mask == mask:
+            return -1
+    taken = x | o
+    if taken == FULL:
+        return 0
+
+    if x_to_move:
+        value = -5
+        for bit in ORDER_BITS:
+            if not taken & bit:
+                value = max(value, bit_value(x | bit, o, False, alpha, beta, cancel))
+                alpha = max(alpha, value)
+                if alpha >= beta:
+                    break
+    else:
+        value = 5
+        for bit in ORDER_BITS:
+            if not taken & bit:
+                value = min(value, bit_value(x, o | bit, True, alpha, beta, cancel))
+                beta = min(beta, value)
+                if alpha >= beta:
+                    break
+    return value
+
+
+def bit_move(board, cancel=None):
+    """
+    Returns the optimal action for the current player by searching the
+    bitboard form of the board, breaking ties like max_value and min_value.
+    """
+    x, o = to_bitboard(board)
+    maximizing = player(board) == X
+    best = -5 if maximizing else 5
+    best_move = ()
+    alpha, beta = -1, 1
+    for action in actions(board):
+        bit = 1 << (3 * action[0] + action[1])
+        if maximizing:
+            value = bit_value(x | bit, o, False, alpha, beta, cancel)
+        else:
+            value = bit_value(x, o | bit, True, alpha, beta, cancel)
+        if maximizing and value > best:
+            best, best_move, alpha = value, action, value
+        elif not maximizing and value < best:
+            best, best_move, beta = value, action, value
+        if best == (1 if maximizing else -1):
+            break
+    return best_move
+
+
+def build_book():
+    """
+    Solves every position reachable from the initial state and returns
+    the book: one byte per base-3 board encoding, holding
+    3 * (3 * i + j) + value + 1 for the best move (i, j) and its value,
+    or NOT_IN_BOOK for unreachable and finished positions.
+    """
+    book = bytearray([NOT_IN_BOOK]) * 3 ** 9
+    stack = [initial_state()]
+    while stack:
+        board = stack.pop()
+        code = encode(board)
+        if book[code] != NOT_IN_BOOK or terminal(board):
+            continue
+        i, j = bit_move(board)
+        x, o = to_bitboard(board)
+        value = bit_value(x, o, player(board) == X, -1, 1)
+        book[code] = 3 * (3 * i + j) + value + 1
+        for action in actions(board):
+            stack.append(result(board, action))
+    return book
+
+
+def write_book(path=BOOK_PATH):
+    """
+    Writes the book from build_book to path.
+    """
+    with open(path, "wb") as f:
+        f.write(build_book())
+
+
+def load_book(path=BOOK_PATH):
+    """
+    Returns the book written by write_book, or None if there is none.
+    """
+    try:
+        with open(path, "rb") as f:
+            book = f.read()
+    except FileNotFoundError:
+        return None
+    if len(book) != 3 ** 9:
+        return None
+    return book
+
+
+def book_entry(board, book):
+    """
+    Returns (action, value) for the board from the book,
+    or None if the book does not cover it.
+    """
+    entry = book[encode(board)]
+    if entry == NOT_IN_BOOK:
+        return None
+    cell, value = divmod(entry, 3)
+    return divmod(cell, 3), value - 1
+
+
+def minimax(board, pruning=False, table=None, bitboard=False, book=None,
+            k=3, time_limit=None, cancel=None):
     """
     Returns the optimal action for the current player on the board.
+
+    If pruning is True, searches with alpha-beta pruning and move
+    ordering, which returns the same move much faster. If table is a
+    TranspositionTable, positions already solved in it, or symmetric
+    to one that was, are answered from it instead of searched again.
+    If bitboard is True, the alpha-beta search runs on bit masks.
+    If book is given (see load_book), positions it covers are looked
+    up directly and only others are searched.
+
+    Boards other than 3x3 with 3 in a row, or any board when time_limit
+    is given, are searched by iterative_deepening within time_limit
+    seconds (DEFAULT_TIME_LIMIT if not given); the other options
+    only apply to the classic game.
+
+    If cancel is an event, such as a threading.Event, setting it from
+    another thread stops the search, which then raises SearchTimeout.
     """
     current_player = player(board)
 
-    if(terminal(board) == True):
+    if(terminal(board, k) == True):
         return None
+    elif(time_limit is not None or k != 3
+         or len(board) != 3 or len(board[0]) != 3):
+        return iterative_deepening(
+            board, k, time_limit or DEFAULT_TIME_LIMIT, cancel)
+    elif(book is not None and book_entry(board, book) is not None):
+        return book_entry(board, book)[0]
+    elif(bitboard):
+        return bit_move(board, cancel)
+    elif(table is not None):
+        return cached_move(board, table, cancel)
+    elif(pruning):
+        return alpha_beta_move(board, cancel)
     elif(current_player == 'X'):
-        return max_value(board)[1]
+        return max_value(board, cancel)[1]
     elif(current_player == 'O'):
-        return min_value(board)[1]
-    
+        return min_value(board, cancel)[1]
+
+
+if __name__ == "__main__":
+    write_book()
+    print(f"Wrote {BOOK_PATH}")
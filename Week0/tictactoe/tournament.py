@@ -0,0 +1,116 @@
+"""
+Headless self-play tournament between tictactoe engine configurations
+"""
+from itertools import permutations
+import multiprocessing
+import random
+import sys
+import time
+
+import tictactoe as ttt
+
+# Keyword arguments for ttt.minimax, built once per worker process so
+# the table and book engines keep their state between moves and games
+ENGINES = {
+    "minimax": lambda: {},
+    "alphabeta": lambda: {"pruning": True},
+    "table": lambda: {"table": ttt.TranspositionTable()},
+    "bitboard": lambda: {"bitboard": True},
+    "book": lambda: {"book": ttt.load_book()},
+    "deepening": lambda: {"time_limit": 0.05},
+}
+
+engine_options = {}
+
+
+def play(game):
+    """
+    Plays one game, opening with a few random moves for variety, and
+    returns (winner, moves) where moves lists (engine, nodes, seconds)
+    for every engine move.
+    """
+    x_engine, o_engine, opening_moves, seed = game
+    rng = random.Random(seed)
+    board = ttt.initial_state()
+    for _ in range(opening_moves):
+        board = ttt.result(board, rng.choice(sorted(ttt.actions(board))))
+
+    moves = []
+    while not ttt.terminal(board):
+        engine = x_engine if ttt.player(board) == ttt.X else o_engine
+        if engine not in engine_options:
+            engine_options[engine] = ENGINES[engine]()
+
+        ttt.nodes_searched = 0
+        start = time.perf_counter()
+        move = ttt.minimax(board, **engine_options[engine])
+        elapsed = time.perf_counter() - start
+        moves.append((engine, ttt.nodes_searched, elapsed))
+        board = ttt.result(board, move)
+
+    return ttt.winner(board), moves
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def report(engines, games, results):
+    """
+    Prints node counts, throughput, move latency percentiles and
+    win/draw/loss counts for each engine.
+    """
+    for engine in engines:
+        nodes = 0
+        latencies = []
+        wins = draws = losses = 0
+        for (x_engine, o_engine, _, _), (winner, moves) in zip(games, results):
+            for name, searched, elapsed in moves:
+                if name == engine:
+                    nodes += searched
+                    latencies.append(elapsed)
+            if engine not in (x_engine, o_engine):
+                continue
+            if winner is None:
+                draws += 1
+            elif (winner == ttt.X) == (engine == x_engine):
+                wins += 1
+            else:
+                losses += 1
+
+        total = sum(latencies)
+        print(f"{engine}: {len(latencies)} moves, {nodes} nodes, "
+              f"{nodes / total if total else 0:.0f} nodes/s")
+        print(f"    latency p50 {percentile(latencies, 0.5) * 1000:.2f}ms, "
+              f"p90 {percentile(latencies, 0.9) * 1000:.2f}ms, "
+              f"p99 {percentile(latencies, 0.99) * 1000:.2f}ms")
+        print(f"    {wins} wins, {draws} draws, {losses} losses")
+
+
+def main():
+    if len(sys.argv) < 2:
+        sys.exit("Usage: python tournament.py games [engine ...]")
+    num_games = int(sys.argv[1])
+    engines = sys.argv[2:] or ["alphabeta", "table", "bitboard", "book", "deepening"]
+    for engine in engines:
+        if engine not in ENGINES:
+            sys.exit(f"Unknown engine {engine}, choose from {', '.join(ENGINES)}")
+
+    # Every engine plays every other with both colors, num_games times
+    pairings = list(permutations(engines, 2)) or [(engines[0], engines[0])]
+    games = [
+        (x_engine, o_engine, 2, seed)
+        for seed in range(num_games)
+        for x_engine, o_engine in pairings
+    ]
+
+    start = time.perf_counter()
+    with multiprocessing.Pool() as pool:
+        results = pool.map(play, games)
+    print(f"Played {len(games)} games in {time.perf_counter() - start:.2f}s")
+    report(engines, games, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+import sys
+import time
+import tracemalloc
+
+import logic
+from logic import *
+from generator import generate_puzzle
+
+# Largest number of characters each backend is run on, so that every
+# size finishes in seconds; None for no limit
+BACKENDS = {
+    "tree": 6,
+    "enumerate": 8,
+    "dpll": 25,
+    "cdcl": None,
+    "knowledgebase": None,
+}
+
+
+def solve(backend, knowledge, symbols):
+    """Returns the list of symbols entailed by knowledge, using backend."""
+    if backend == "knowledgebase":
+        entailed = KnowledgeBase(knowledge).entailed(symbols)
+        return [symbol for symbol in symbols if entailed[symbol]]
+    return [
+        symbol for symbol in symbols
+        if model_check(knowledge, symbol, method=backend)
+    ]
+
+
+def main():
+    if len(sys.argv) > 3:
+        sys.exit("Usage: python benchmark.py [characters] [statements]")
+    if len(sys.argv) >= 2:
+        characters = int(sys.argv[1])
+        statements = int(sys.argv[2]) if len(sys.argv) == 3 else 2 * characters
+        sizes = [(characters, statements)]
+    else:
+        sizes = [(n, 2 * n) for n in [3, 6, 10, 25, 50, 100, 200]]
+
+    for characters, statements in sizes:
+        knowledge, symbols = generate_puzzle(characters, statements)
+        print(f"{characters} characters, {statements} statements:")
+        expected = None
+        for backend, limit in BACKENDS.items():
+            if limit is not None and characters > limit:
+                continue
+
+            logic.models_evaluated = 0
+            start = time.perf_counter()
+            entailed = solve(backend, knowledge, symbols)
+            elapsed = time.perf_counter() - start
+            models = logic.models_evaluated
+
+            if expected is None:
+                expected = entailed
+            elif entailed != expected:
+                sys.exit(f"{backend} disagrees on which symbols are entailed")
+
+            # The timed run above is untraced: tracemalloc hooks every
+            # allocation, and the tree backend copies a model dict and DPLL
+            # rebuilds its clause list at every step, so peak memory gets
+            # its own solve
+            tracemalloc.start()
+            solve(backend, knowledge, symbols)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            line = (f"    {backend}: {elapsed:.3f}s, "
+                    f"{len(symbols) / elapsed:.0f} queries/s")
+            if models:
+                line += f", {models / elapsed:.0f} models/s"
+            print(f"{line}, peak memory {peak / 1024:.0f} KiB")
+        print(f"    {len(expected)} of {len(symbols)} symbols entailed")
+
+
+if __name__ == "__main__":
+    main()
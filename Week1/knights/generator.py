@@ -0,0 +1,68 @@
+import random
+
+from logic import *
+
+
+def generate_puzzle(characters, statements, seed=0):
+    """Returns (knowledge, symbols) for a random knights and knaves puzzle.
+
+    A hidden assignment of knights and knaves is drawn, then each of the
+    statements is made by a random character about one or two others:
+    that someone is a knight or a knave, that two are both knights,
+    that at least one of two is a knight, that one being a knight implies
+    the other is a knave, or that two are of the same kind. Knights only
+    make true statements and knaves false ones, so the puzzle always has
+    the hidden assignment as a solution.
+
+    As in puzzle.py, knowledge says every character is exactly one of
+    the two, and that each statement holds if and only if its speaker
+    is a knight. symbols lists each character's "Knight" and "Knave"
+    symbols in order.
+    """
+    rng = random.Random(seed)
+    knights = [Symbol(f"{name(i)} is a Knight") for i in range(characters)]
+    knaves = [Symbol(f"{name(i)} is a Knave") for i in range(characters)]
+    truth = {}
+    for knight, knave in zip(knights, knaves):
+        is_knight = rng.random() < 0.5
+        truth[knight.name] = is_knight
+        truth[knave.name] = not is_knight
+
+    knowledge = And()
+    for knight, knave in zip(knights, knaves):
+        knowledge.add(Or(knight, knave))
+        knowledge.add(Not(And(knight, knave)))
+
+    for _ in range(statements):
+        speaker = rng.randrange(characters)
+        j = rng.randrange(characters)
+        k = rng.randrange(characters)
+        kind = rng.randrange(5)
+        if kind == 0:
+            statement = rng.choice([knights[j], knaves[j]])
+        elif kind == 1:
+            statement = And(knights[j], knights[k])
+        elif kind == 2:
+            statement = Or(knights[j], knights[k])
+        elif kind == 3:
+            statement = Implication(knights[j], knaves[k])
+        else:
+            statement = Biconditional(knights[j], knights[k])
+
+        if statement.evaluate(truth) != truth[knights[speaker].name]:
+            statement = Not(statement)
+        knowledge.add(Implication(knights[speaker], statement))
+        knowledge.add(Implication(knaves[speaker], Not(statement)))
+
+    symbols = [symbol for pair in zip(knights, knaves) for symbol in pair]
+    return knowledge, symbols
+
+
+def name(i):
+    """Returns a spreadsheet-style name for character i: A, ..., Z, AA, ..."""
+    letters = ""
+    i += 1
+    while i:
+        i, remainder = divmod(i - 1, 26)
+        letters = chr(ord("A") + remainder) + letters
+    return letters
@@ -1,8 +1,14 @@
+import heapq
 import itertools
+import weakref
 
 
 class Sentence():
 
+    # Interned sentences (see intern) set _hash and _symbols;
+    # they are None for all others
+    __slots__ = ("_hash", "_symbols", "__weakref__")
+
     def evaluate(self, model):
         """Evaluates the logical sentence."""
         raise Exception("nothing to evaluate")
@@ -43,14 +49,20 @@ class Sentence():
 
 
 class Symbol(Sentence):
+    __slots__ = ("name",)
 
     def __init__(self, name):
         self.name = name
+        self._hash = self._symbols = None
 
     def __eq__(self, other):
+        if self is other:
+            return True
         return isinstance(other, Symbol) and self.name == other.name
 
     def __hash__(self):
+        if self._hash is not None:
+            return self._hash
         return hash(("symbol", self.name))
 
     def __repr__(self):
@@ -66,18 +78,27 @@ class Symbol(Sentence):
         return self.name
 
     def symbols(self):
+        if self._symbols is not None:
+            return self._symbols
         return {self.name}
 
 
 class Not(Sentence):
+    __slots__ = ("operand",)
+
     def __init__(self, operand):
         Sentence.validate(operand)
         self.operand = operand
+        self._hash = self._symbols = None
 
     def __eq__(self, other):
+        if self is other:
+            return True
         return isinstance(other, Not) and self.operand == other.operand
 
     def __hash__(self):
+        if self._hash is not None:
+            return self._hash
         return hash(("not", hash(self.operand)))
 
     def __repr__(self):
@@ -90,19 +111,28 @@ class Not(Sentence):
         return "¬" + Sentence.parenthesize(self.operand.formula())
 
     def symbols(self):
+        if self._symbols is not None:
+            return self._symbols
         return self.operand.symbols()
 
 
 class And(Sentence):
+    __slots__ = ("conjuncts",)
+
     def __init__(self, *conjuncts):
         for conjunct in conjuncts:
             Sentence.validate(conjunct)
         self.conjuncts = list(conjuncts)
+        self._hash = self._symbols = None
 
     def __eq__(self, other):
+        if self is other:
+            return True
         return isinstance(other, And) and self.conjuncts == other.conjuncts
 
     def __hash__(self):
+        if self._hash is not None:
+            return self._hash
         return hash(
             ("and", tuple(hash(conjunct) for conjunct in self.conjuncts))
         )
@@ -115,6 +145,8 @@ class And(Sentence):
 
     def add(self, conjunct):
         Sentence.validate(conjunct)
+        if self._hash is not None:
+            raise TypeError("interned sentences cannot be changed")
         self.conjuncts.append(conjunct)
 
     def evaluate(self, model):
@@ -127,19 +159,28 @@ class And(Sentence):
                            for conjunct in self.conjuncts])
 
     def symbols(self):
-        return set.union(*[conjunct.symbols() for conjunct in self.conjuncts])
+        if self._symbols is not None:
+            return self._symbols
+        return set().union(*[conjunct.symbols() for conjunct in self.conjuncts])
 
 
 class Or(Sentence):
+    __slots__ = ("disjuncts",)
+
     def __init__(self, *disjuncts):
         for disjunct in disjuncts:
             Sentence.validate(disjunct)
         self.disjuncts = list(disjuncts)
+        self._hash = self._symbols = None
 
     def __eq__(self, other):
+        if self is other:
+            return True
         return isinstance(other, Or) and self.disjuncts == other.disjuncts
 
     def __hash__(self):
+        if self._hash is not None:
+            return self._hash
         return hash(
             ("or", tuple(hash(disjunct) for disjunct in self.disjuncts))
         )
@@ -158,22 +199,31 @@ class Or(Sentence):
                             for disjunct in self.disjuncts])
 
     def symbols(self):
-        return set.union(*[disjunct.symbols() for disjunct in self.disjuncts])
+        if self._symbols is not None:
+            return self._symbols
+        return set().union(*[disjunct.symbols() for disjunct in self.disjuncts])
 
 
 class Implication(Sentence):
+    __slots__ = ("antecedent", "consequent")
+
     def __init__(self, antecedent, consequent):
         Sentence.validate(antecedent)
         Sentence.validate(consequent)
         self.antecedent = antecedent
         self.consequent = consequent
+        self._hash = self._symbols = None
 
     def __eq__(self, other):
+        if self is other:
+            return True
         return (isinstance(other, Implication)
                 and self.antecedent == other.antecedent
                 and self.consequent == other.consequent)
 
     def __hash__(self):
+        if self._hash is not None:
+            return self._hash
         return hash(("implies", hash(self.antecedent), hash(self.consequent)))
 
     def __repr__(self):
@@ -189,22 +239,31 @@ class Implication(Sentence):
         return f"{antecedent} => {consequent}"
 
     def symbols(self):
-        return set.union(self.antecedent.symbols(), self.consequent.symbols())
+        if self._symbols is not None:
+            return self._symbols
+        return set().union(self.antecedent.symbols(), self.consequent.symbols())
 
 
 class Biconditional(Sentence):
+    __slots__ = ("left", "right")
+
     def __init__(self, left, right):
         Sentence.validate(left)
         Sentence.validate(right)
         self.left = left
         self.right = right
+        self._hash = self._symbols = None
 
     def __eq__(self, other):
+        if self is other:
+            return True
         return (isinstance(other, Biconditional)
                 and self.left == other.left
                 and self.right == other.right)
 
     def __hash__(self):
+        if self._hash is not None:
+            return self._hash
         return hash(("biconditional", hash(self.left), hash(self.right)))
 
     def __repr__(self):
@@ -222,17 +281,102 @@ class Biconditional(Sentence):
         return f"{left} <=> {right}"
 
     def symbols(self):
-        return set.union(self.left.symbols(), self.right.symbols())
-
-
-def model_check(knowledge, query):
-    """Checks if knowledge base entails query."""
+        if self._symbols is not None:
+            return self._symbols
+        return set().union(self.left.symbols(), self.right.symbols())
+
+
+# Interned sentences, keyed by their class and their children's identities
+interned = weakref.WeakValueDictionary()
+
+
+def intern(sentence):
+    """Returns the interned sentence structurally equal to sentence.
+
+    Interned sentences are shared: building the same formula twice gives
+    the same object, so equal subformulas are stored once and compare by
+    identity. Their hash and symbols are computed once on creation, and
+    they cannot be changed with And.add.
+    """
+    if sentence._hash is not None:
+        return sentence
+
+    kind = type(sentence)
+    if kind is Symbol:
+        children = ()
+        key = (Symbol, sentence.name)
+    else:
+        if kind is Not:
+            children = (intern(sentence.operand),)
+        elif kind is Implication:
+            children = (intern(sentence.antecedent), intern(sentence.consequent))
+        elif kind is Biconditional:
+            children = (intern(sentence.left), intern(sentence.right))
+        elif kind is And:
+            children = tuple([intern(conjunct) for conjunct in sentence.conjuncts])
+        elif kind is Or:
+            children = tuple([intern(disjunct) for disjunct in sentence.disjuncts])
+        else:
+            raise TypeError(f"cannot intern {sentence}")
+        key = (kind, *map(id, children))
+
+    node = interned.get(key)
+    if node is None:
+        node = Symbol(sentence.name) if kind is Symbol else kind(*children)
+        node._hash = hash(node)
+        node._symbols = frozenset(node.symbols())
+        interned[key] = node
+    return node
+
+
+# Number of models evaluated by enumerating model checks, for benchmarking
+models_evaluated = 0
+
+
+def model_check(knowledge, query, method="enumerate"):
+    """Checks if knowledge base entails query.
+
+    By default every model is enumerated, with both sentences compiled
+    to Python functions over models packed into integers; method="tree"
+    enumerates models as dicts and walks the sentence objects instead.
+    With method="dpll" or method="cdcl" the knowledge base and the
+    negated query are converted to CNF and entailment holds if the
+    solver finds them unsatisfiable.
+    """
+    if method == "dpll":
+        cnf = CNF()
+        cnf.add(knowledge)
+        cnf.add(Not(query))
+        return dpll(cnf.clauses) is None
+    elif method == "cdcl":
+        cnf = CNF()
+        cnf.add(knowledge)
+        cnf.add(Not(query))
+        solver = Solver()
+        for clause in cnf.clauses:
+            solver.add_clause(clause)
+        return solver.solve() is None
+    elif method == "enumerate":
+        symbols = sorted(set().union(knowledge.symbols(), query.symbols()))
+        knowledge_holds = compile_sentence(knowledge, symbols)
+        query_holds = compile_sentence(query, symbols)
+        global models_evaluated
+        for model in range(1 << len(symbols)):
+            if knowledge_holds(model) and not query_holds(model):
+                models_evaluated += model + 1
+                return False
+        models_evaluated += 1 << len(symbols)
+        return True
+    elif method != "tree":
+        raise ValueError(f"unknown model checking method {method}")
 
     def check_all(knowledge, query, symbols, model):
         """Checks if knowledge base entails query, given a particular model."""
 
         # If model has an assignment for each symbol
         if not symbols:
+            global models_evaluated
+            models_evaluated += 1
 
             # If knowledge base is true in model, then query must also be true
             if knowledge.evaluate(model):
@@ -257,7 +401,646 @@ def model_check(knowledge, query):
                     check_all(knowledge, query, remaining, model_false))
 
     # Get all symbols in both knowledge and query
-    symbols = set.union(knowledge.symbols(), query.symbols())
+    symbols = set().union(knowledge.symbols(), query.symbols())
 
     # Check that knowledge entails query
     return check_all(knowledge, query, symbols, dict())
+
+
+# Deepest parenthesis nesting allowed in compiled source before a
+# subformula is moved into a temporary; CPython rejects source nested
+# more than 200 levels deep
+COMPILE_NESTING = 50
+
+
+def compile_sentence(sentence, symbols):
+    """Returns a function that evaluates sentence on a model given as an
+    integer, in which bit i holds the value of the symbol named symbols[i].
+
+    The sentence is translated once into Python source, so evaluating a
+    model involves no method calls or dict lookups. Subformulas that
+    would nest too deeply are computed first into temporaries.
+    """
+    bits = {name: i for i, name in enumerate(symbols)}
+    temporaries = []
+    source, _ = expression(sentence, bits, temporaries)
+    lines = ["def holds(model):"]
+    lines.extend(
+        f"    t{i} = bool({temporary})"
+        for i, temporary in enumerate(temporaries)
+    )
+    lines.append(f"    return bool({source})")
+    namespace = {}
+    exec("\n".join(lines), namespace)
+    return namespace["holds"]
+
+
+def expression(sentence, bits, temporaries):
+    """Returns Python source evaluating sentence on an integer model,
+    with its parenthesis nesting depth.
+
+    Subformulas deeper than COMPILE_NESTING are appended to temporaries
+    and referred to by name.
+    """
+    if isinstance(sentence, Symbol):
+        return f"(model >> {bits[sentence.name]} & 1)", 1
+    if isinstance(sentence, Not):
+        operand, depth = expression(sentence.operand, bits, temporaries)
+        source, depth = f"(not {operand})", depth + 1
+    elif isinstance(sentence, (And, Or)):
+        if isinstance(sentence, And):
+            children, joiner, empty = sentence.conjuncts, " and ", "True"
+        else:
+            children, joiner, empty = sentence.disjuncts, " or ", "False"
+        if not children:
+            return empty, 0
+        compiled = [
+            expression(child, bits, temporaries) for child in children
+        ]
+        source = "(" + joiner.join(child for child, _ in compiled) + ")"
+        depth = max(depth for _, depth in compiled) + 1
+    elif isinstance(sentence, Implication):
+        antecedent, left_depth = expression(
+            sentence.antecedent, bits, temporaries)
+        consequent, right_depth = expression(
+            sentence.consequent, bits, temporaries)
+        source = f"((not {antecedent}) or {consequent})"
+        depth = max(left_depth + 2, right_depth + 1)
+    elif isinstance(sentence, Biconditional):
+        left, left_depth = expression(sentence.left, bits, temporaries)
+        right, right_depth = expression(sentence.right, bits, temporaries)
+        source = f"((not {left}) == (not {right}))"
+        depth = max(left_depth, right_depth) + 2
+    else:
+        raise TypeError(f"cannot compile {sentence}")
+    if depth > COMPILE_NESTING:
+        temporaries.append(source)
+        return f"t{len(temporaries) - 1}", 0
+    return source, depth
+
+
+class CNF():
+    """Conjunctive normal form of sentences, for use by SAT solvers.
+
+    Clauses are lists of integer literals: variable v is true in a
+    clause as v and false as -v. Symbols get variables as they are
+    first seen; compound subformulas are given fresh variables defined
+    by clauses (the Tseitin encoding), so the CNF is equisatisfiable
+    with the sentences added and grows only linearly with them.
+    """
+
+    def __init__(self):
+        self.variables = {}
+        self.num_variables = 0
+        self.clauses = []
+        self.literals = {}
+
+    def variable(self, name):
+        """Returns the variable of a symbol name, creating it if needed."""
+        if name not in self.variables:
+            self.num_variables += 1
+            self.variables[name] = self.num_variables
+        return self.variables[name]
+
+    def new_variable(self):
+        self.num_variables += 1
+        return self.num_variables
+
+    def add(self, sentence):
+        """Adds clauses asserting that sentence is true."""
+        if isinstance(sentence, And):
+            for conjunct in sentence.conjuncts:
+                self.add(conjunct)
+        elif isinstance(sentence, Or):
+            self.clauses.append(
+                [self.literal(disjunct) for disjunct in sentence.disjuncts]
+            )
+        else:
+            self.clauses.append([self.literal(sentence)])
+
+    def literal(self, sentence):
+        """Returns a literal equivalent to sentence."""
+        if isinstance(sentence, Symbol):
+            return self.variable(sentence.name)
+        if isinstance(sentence, Not):
+            return -self.literal(sentence.operand)
+
+        # Interned, repeated subformulas share one variable and are
+        # looked up by their cached hash
+        sentence = intern(sentence)
+        if sentence in self.literals:
+            return self.literals[sentence]
+
+        a = self.new_variable()
+        if isinstance(sentence, And):
+            operands = [self.literal(c) for c in sentence.conjuncts]
+            self.clauses.extend([-a, operand] for operand in operands)
+            self.clauses.append([a] + [-operand for operand in operands])
+        elif isinstance(sentence, Or):
+            operands = [self.literal(d) for d in sentence.disjuncts]
+            self.clauses.extend([a, -operand] for operand in operands)
+            self.clauses.append([-a] + operands)
+        elif isinstance(sentence, Implication):
+            p = self.literal(sentence.antecedent)
+            q = self.literal(sentence.consequent)
+            self.clauses.extend([[-a, -p, q], [a, p], [a, -q]])
+        elif isinstance(sentence, Biconditional):
+            p = self.literal(sentence.left)
+            q = self.literal(sentence.right)
+            self.clauses.extend(
+                [[-a, -p, q], [-a, p, -q], [a, p, q], [a, -p, -q]]
+            )
+        else:
+            raise TypeError(f"cannot convert {sentence} to CNF")
+        self.literals[sentence] = a
+        return a
+
+    def model(self, assignment):
+        """Returns a model of symbol names from a solver's assignment,
+        with unassigned symbols set to False."""
+        return {
+            name: assignment.get(variable, False)
+            for name, variable in self.variables.items()
+        }
+
+
+def simplify(clauses, literal):
+    """Returns clauses with literal made true: satisfied clauses are
+    dropped and the opposite literal removed from the rest."""
+    return [
+        [other for other in clause if other != -literal]
+        for clause in clauses
+        if literal not in clause
+    ]
+
+
+def dpll(clauses, assignment=None):
+    """Returns a satisfying assignment {variable: bool} of the clauses,
+    or None if they are unsatisfiable.
+
+    Implements DPLL: unit propagation and pure literal elimination,
+    then branching on the most frequent literal.
+    """
+    assignment = dict(assignment or {})
+    while True:
+        if any(not clause for clause in clauses):
+            return None
+
+        # Unit propagation
+        unit = next((clause[0] for clause in clauses if len(clause) == 1), None)
+        if unit is not None:
+            assignment[abs(unit)] = unit > 0
+            clauses = simplify(clauses, unit)
+            continue
+
+        # Pure literal elimination
+        literals = {literal for clause in clauses for literal in clause}
+        pure = [literal for literal in literals if -literal not in literals]
+        if not pure:
+            break
+        for literal in pure:
+            assignment[abs(literal)] = literal > 0
+            clauses = simplify(clauses, literal)
+
+    if not clauses:
+        return assignment
+
+    counts = {}
+    for clause in clauses:
+        for literal in clause:
+            counts[literal] = counts.get(literal, 0) + 1
+    literal = max(counts, key=counts.get)
+    for choice in (literal, -literal):
+        result = dpll(simplify(clauses, choice), {**assignment, abs(choice): choice > 0})
+        if result is not None:
+            return result
+    return None
+
+
+class Solver():
+    """Conflict-driven clause learning SAT solver over integer literals.
+
+    Clauses are watched by their first two literals, so propagation
+    only visits clauses whose watched literal became false. Conflicts
+    are analyzed to the first unique implication point and the learned
+    clause is kept; branching follows VSIDS activity with saved phases,
+    and the search restarts on the Luby sequence.
+
+    Clauses can be added between calls to solve, and solve can be given
+    assumption literals, so one solver answers many related queries
+    while keeping what it has learned.
+    """
+
+    RESTART_BASE = 100
+    DECAY = 0.95
+
+    def __init__(self):
+        self.ok = True
+        self.clauses = []
+        self.learned = []
+        self.watches = {}
+
+        # Per variable, indexed from 1
+        self.value = [None]
+        self.level = [0]
+        self.reason = [None]
+        self.activity = [0.0]
+        self.phase = [False]
+
+        self.trail = []
+        self.trail_lim = []
+        self.head = 0
+        self.heap = []
+        self.increment = 1.0
+        self.conflicts = 0
+
+    @property
+    def num_variables(self):
+        return len(self.value) - 1
+
+    def ensure_variables(self, count):
+        while self.num_variables < count:
+            self.value.append(None)
+            self.level.append(0)
+            self.reason.append(None)
+            self.activity.append(0.0)
+            self.phase.append(False)
+            heapq.heappush(self.heap, (0.0, self.num_variables))
+
+    def literal_value(self, literal):
+        value = self.value[abs(literal)]
+        if value is None:
+            return None
+        return value if literal > 0 else not value
+
+    def add_clause(self, clause):
+        """Adds a clause; returns False if the solver became unsatisfiable."""
+        if not self.ok:
+            return False
+        self.backtrack(0)
+        self.ensure_variables(max((abs(literal) for literal in clause), default=0))
+
+        literals = []
+        for literal in clause:
+            value = self.literal_value(literal)
+            if value is True or -literal in literals:
+                return True
+            if value is None and literal not in literals:
+                literals.append(literal)
+
+        if not literals:
+            self.ok = False
+        elif len(literals) == 1:
+            self.assign(literals[0], None)
+            self.ok = self.propagate() is None
+        else:
+            self.clauses.append(literals)
+            self.watch(literals)
+        return self.ok
+
+    def watch(self, clause):
+        self.watches.setdefault(clause[0], []).append(clause)
+        self.watches.setdefault(clause[1], []).append(clause)
+
+    def assign(self, literal, reason):
+        variable = abs(literal)
+        self.value[variable] = literal > 0
+        self.level[variable] = len(self.trail_lim)
+        self.reason[variable] = reason
+        self.trail.append(literal)
+
+    def propagate(self):
+        """Assigns every literal implied by unit clauses; returns a
+        conflicting clause, or None."""
+        value = self.value
+        while self.head < len(self.trail):
+            false_literal = -self.trail[self.head]
+            self.head += 1
+            watching = self.watches.get(false_literal, [])
+            kept = []
+            for i, clause in enumerate(watching):
+                if clause[0] == false_literal:
+                    clause[0], clause[1] = clause[1], clause[0]
+                first = clause[0]
+                first_value = value[abs(first)]
+                if first_value is not None and first_value == (first > 0):
+                    kept.append(clause)
+                    continue
+
+                # Look for a literal that is not false to watch instead
+                for k in range(2, len(clause)):
+                    other = clause[k]
+                    other_value = value[abs(other)]
+                    if other_value is None or other_value == (other > 0):
+                        clause[1], clause[k] = other, clause[1]
+                        self.watches.setdefault(other, []).append(clause)
+                        break
+                else:
+                    kept.append(clause)
+                    if first_value is not None:
+                        kept.extend(watching[i + 1:])
+                        self.watches[false_literal] = kept
+                        return clause
+                    self.assign(first, clause)
+            self.watches[false_literal] = kept
+        return None
+
+    def analyze(self, conflict):
+        """Returns the first-UIP clause learned from a conflict and the
+        decision level to backtrack to."""
+        current = len(self.trail_lim)
+        learned = [None]
+        seen = set()
+        pending = 0
+        literal = None
+        index = len(self.trail) - 1
+        clause = conflict
+        while True:
+            for other in (clause if literal is None else clause[1:]):
+                variable = abs(other)
+                if variable not in seen and self.level[variable] > 0:
+                    seen.add(variable)
+                    self.bump(variable)
+                    if self.level[variable] == current:
+                        pending += 1
+                    else:
+                        learned.append(other)
+            while abs(self.trail[index]) not in seen:
+                index -= 1
+            literal = self.trail[index]
+            index -= 1
+            pending -= 1
+            if pending == 0:
+                break
+            clause = self.reason[abs(literal)]
+        learned[0] = -literal
+
+        if len(learned) == 1:
+            return learned, 0
+        # Watch the literal from the highest remaining level second
+        deepest = max(range(1, len(learned)), key=lambda i: self.level[abs(learned[i])])
+        learned[1], learned[deepest] = learned[deepest], learned[1]
+        return learned, self.level[abs(learned[1])]
+
+    def bump(self, variable):
+        self.activity[variable] += self.increment
+        if self.activity[variable] > 1e100:
+            self.activity = [activity * 1e-100 for activity in self.activity]
+            self.increment *= 1e-100
+            self.heap = [(-self.activity[v], v) for v in range(1, len(self.value))
+                         if self.value[v] is None]
+            heapq.heapify(self.heap)
+        elif self.value[variable] is None:
+            heapq.heappush(self.heap, (-self.activity[variable], variable))
+
+    def backtrack(self, level):
+        if len(self.trail_lim) <= level:
+            return
+        for literal in self.trail[self.trail_lim[level]:]:
+            variable = abs(literal)
+            self.value[variable] = None
+            self.reason[variable] = None
+            self.phase[variable] = literal > 0
+            heapq.heappush(self.heap, (-self.activity[variable], variable))
+        del self.trail[self.trail_lim[level]:]
+        del self.trail_lim[level:]
+        self.head = len(self.trail)
+
+    def pick_variable(self):
+        """Returns the unassigned variable with the highest activity, or None."""
+        while self.heap:
+            activity, variable = heapq.heappop(self.heap)
+            if self.value[variable] is None and -activity == self.activity[variable]:
+                return variable
+        return None
+
+    def solve(self, assumptions=()):
+        """Returns a satisfying assignment {variable: bool} in which every
+        assumption literal is true, or None if there is none."""
+        if not self.ok:
+            return None
+        self.ensure_variables(max((abs(literal) for literal in assumptions), default=0))
+        restarts = 0
+        limit = luby(restarts) * self.RESTART_BASE
+        conflicts = 0
+
+        while True:
+            conflict = self.propagate()
+            if conflict is not None:
+                self.conflicts += 1
+                conflicts += 1
+                if not self.trail_lim:
+                    self.ok = False
+                    return None
+                learned, level = self.analyze(conflict)
+                self.backtrack(level)
+                if len(learned) == 1:
+                    self.assign(learned[0], None)
+                else:
+                    self.learned.append(learned)
+                    self.watch(learned)
+                    self.assign(learned[0], learned)
+                self.increment /= self.DECAY
+                continue
+
+            if conflicts >= limit:
+                restarts += 1
+                limit = luby(restarts) * self.RESTART_BASE
+                conflicts = 0
+                self.backtrack(0)
+                continue
+
+            level = len(self.trail_lim)
+            if level < len(assumptions):
+                literal = assumptions[level]
+                value = self.literal_value(literal)
+                if value is False:
+                    self.backtrack(0)
+                    return None
+                self.trail_lim.append(len(self.trail))
+                if value is None:
+                    self.assign(literal, None)
+                continue
+
+            variable = self.pick_variable()
+            if variable is None:
+                model = {v: self.value[v] for v in range(1, len(self.value))}
+                self.backtrack(0)
+                return model
+            self.trail_lim.append(len(self.trail))
+            self.assign(variable if self.phase[variable] else -variable, None)
+
+
+class KnowledgeBase():
+    """Knowledge base that sentences can be added to over time and that
+    answers entailment queries with one persistent CDCL solver.
+
+    Queries are decided under assumptions, so clauses learned for one
+    query speed up the next, and models found along the way rule out
+    every query they falsify without further search.
+    """
+
+    def __init__(self, *sentences):
+        self.cnf = CNF()
+        self.solver = Solver()
+        self.loaded = 0
+        for sentence in sentences:
+            self.add(sentence)
+
+    def add(self, sentence):
+        """Adds a sentence to the knowledge base."""
+        self.cnf.add(sentence)
+        self.load()
+
+    def load(self):
+        """Passes clauses added to the CNF since the last call to the solver."""
+        for clause in self.cnf.clauses[self.loaded:]:
+            self.solver.add_clause(clause)
+        self.loaded = len(self.cnf.clauses)
+
+    def satisfiable(self):
+        return self.solver.solve() is not None
+
+    def entails(self, query):
+        """Checks if the knowledge base entails query."""
+        return self.entailed([query])[query]
+
+    def entailed(self, queries):
+        """Returns a dict mapping each query to whether it is entailed.
+
+        Each model found is checked against all remaining queries, and
+        a query is only searched for when no model so far falsifies it.
+        """
+        queries = list(queries)
+        literals = {query: self.cnf.literal(query) for query in queries}
+        self.load()
+
+        results = {}
+        pending = list(queries)
+        while pending:
+            query = pending.pop()
+            literal = literals[query]
+            model = self.solver.solve([-literal])
+            if model is None:
+                results[query] = True
+                continue
+            results[query] = False
+            for other in list(pending):
+                value = model.get(abs(literals[other]), False)
+                if value != (literals[other] > 0):
+                    results[other] = False
+                    pending.remove(other)
+        return results
+
+
+def enumerate_models(sentence, symbols=None):
+    """Yields every model of sentence, one dict of symbol name to bool at
+    a time, over its symbols or the given superset of them.
+
+    Each model is found by the CDCL solver, which is then given a clause
+    blocking it; unsatisfying assignments are never visited.
+    """
+    cnf = CNF()
+    cnf.add(sentence)
+    extra = sorted(set(symbols or ()) - set(cnf.variables))
+    solver = Solver()
+    for clause in cnf.clauses:
+        solver.add_clause(clause)
+
+    while True:
+        assignment = solver.solve()
+        if assignment is None:
+            return
+        model = cnf.model(assignment)
+        for values in itertools.product((False, True), repeat=len(extra)):
+            yield {**model, **dict(zip(extra, values))}
+        if not cnf.variables or not solver.add_clause([
+            -variable if model[name] else variable
+            for name, variable in cnf.variables.items()
+        ]):
+            return
+
+
+def count_models(sentence, symbols=None):
+    """Returns the number of models of sentence over its symbols, or
+    over the given superset of them.
+
+    Counts by DPLL-style branching on the CNF of sentence, splitting
+    clauses that share no variables into components counted separately
+    and caching the count of every component seen.
+    """
+    cnf = CNF()
+    cnf.add(sentence)
+    extra = len(set(symbols or ()) - set(cnf.variables))
+
+    # Tseitin variables are determined by the symbols, so counting
+    # every variable of the CNF counts models of the symbols
+    cache = {}
+    variables = frozenset(range(1, cnf.num_variables + 1))
+    return count_clauses(cnf.clauses, variables, cache) * 2 ** extra
+
+
+def count_clauses(clauses, variables, cache):
+    """Returns the number of assignments of variables satisfying clauses."""
+    while True:
+        if any(not clause for clause in clauses):
+            return 0
+        unit = next((clause[0] for clause in clauses if len(clause) == 1), None)
+        if unit is None:
+            break
+        variables = variables - {abs(unit)}
+        clauses = simplify(clauses, unit)
+
+    used = {abs(literal) for clause in clauses for literal in clause}
+    total = 2 ** len(variables - used)
+    for component in components(clauses):
+        key = frozenset(frozenset(clause) for clause in component)
+        if key not in cache:
+            counts = {}
+            for clause in component:
+                for literal in clause:
+                    counts[abs(literal)] = counts.get(abs(literal), 0) + 1
+            variable = max(counts, key=counts.get)
+            scope = frozenset(counts) - {variable}
+            cache[key] = (count_clauses(simplify(component, variable), scope, cache)
+                          + count_clauses(simplify(component, -variable), scope, cache))
+        total *= cache[key]
+        if total == 0:
+            return 0
+    return total
+
+
+def components(clauses):
+    """Returns the clauses grouped into lists that share no variables."""
+    parent = {}
+
+    def find(variable):
+        while parent[variable] != variable:
+            parent[variable] = parent[parent[variable]]
+            variable = parent[variable]
+        return variable
+
+    for clause in clauses:
+        for literal in clause:
+            parent.setdefault(abs(literal), abs(literal))
+        root = find(abs(clause[0]))
+        for literal in clause[1:]:
+            parent[find(abs(literal))] = root
+
+    groups = {}
+    for clause in clauses:
+        groups.setdefault(find(abs(clause[0])), []).append(clause)
+    return list(groups.values())
+
+
+def luby(i):
+    """Returns the i-th term (from 0) of the Luby sequence 1, 1, 2, 1, 1, 2, 4, ..."""
+    size, exponent = 1, 0
+    while size < i + 1:
+        exponent += 1
+        size = 2 * size + 1
+    while size - 1 != i:
+        size = (size - 1) // 2
+        exponent -= 1
+        i %= size
+    return 2 ** exponent
@@ -1,5 +1,6 @@
 import itertools
 import random
+from collections import deque
 
 
 class Minesweeper():
@@ -166,45 +167,108 @@ class MinesweeperAI():
         self.mines = set()
         self.safes = set()
 
-        # List of sentences about the game known to be true
-        self.knowledge = []
+        # Safe cells that have not been clicked on yet
+        self.safe_moves = set()
+
+        # Sentences about the game known to be true, keyed by their cells
+        self.knowledge = {}
+
+        # Keys of the sentences that mention each cell
+        self.index = {}
+
+        # Keys of sentences added or changed since they were last inferred from
+        self.queue = deque()
 
     def mark_mine(self, cell):
         """
-        Marks a cell as a mine, and updates all knowledge
-        to mark that cell as a mine as well.
+        Marks a cell as a mine, and updates the knowledge that
+        mentions that cell to mark it as a mine as well.
         """
+        if cell in self.mines:
+            return
         self.mines.add(cell)
-        for sentence in self.knowledge:
+        for sentence in self.remove_sentences(cell):
             sentence.mark_mine(cell)
+            self.add_sentence(sentence)
 
     def mark_safe(self, cell):
         """
-        Marks a cell as safe, and updates all knowledge
-        to mark that cell as safe as well.
+        Marks a cell as safe, and updates the knowledge that
+        mentions that cell to mark it as safe as well.
         """
+        if cell in self.safes:
+            return
         self.safes.add(cell)
-        for sentence in self.knowledge:
+        if cell not in self.moves_made:
+            self.safe_moves.add(cell)
+        for sentence in self.remove_sentences(cell):
             sentence.mark_safe(cell)
+            self.add_sentence(sentence)
+
+    def add_sentence(self, sentence):
+        """
+        Adds sentence to the knowledge base, unless it is empty or
+        already known, and queues it for inference.
+        """
+        if not sentence.cells:
+            return
+        key = frozenset(sentence.cells)
+        if key in self.knowledge:
+            return
+        self.knowledge[key] = sentence
+        for cell in key:
+            self.index.setdefault(cell, set()).add(key)
+        self.queue.append(key)
+
+    def remove_sentences(self, cell):
+        """
+        Removes and returns every sentence that mentions cell.
+        """
+        sentences = []
+        for key in self.index.pop(cell, ()):
+            sentences.append(self.knowledge.pop(key))
+            for other in key:
+                if other != cell:
+                    self.index[other].discard(key)
+        return sentences
 
     def inference(self):
-        for i in self.knowledge:
-            for j in self.knowledge:
-                if i.cells.issubset(j.cells):
-                    # New Sentence
-                    new_count = i.count - j.count
-                    new_cells = i.cells - j.cells
-                    new_sentence = Sentence(new_cells, new_count)
-
-                    mines = new_sentence.known_mines()
-                    safes = new_sentence.known_safes()
-
-                    if mines:
-                        for mine in mines:
-                            self.mark_mine(mine)
-                    if safes:
-                        for safe in safes:
-                            self.mark_safe(safe)
+        """
+        Draws conclusions from queued sentences until nothing new follows.
+
+        A sentence whose cells are all mines or all safe marks them, and
+        a sentence whose cells are a subset of another's yields the
+        difference of the two. Only sentences sharing a cell with the
+        queued one can be subsets or supersets of it, so the index is
+        used to find them rather than comparing every pair of sentences.
+        """
+        while self.queue:
+            key = self.queue.popleft()
+            sentence = self.knowledge.get(key)
+            if sentence is None:
+                continue
+
+            mines = sentence.known_mines()
+            safes = sentence.known_safes()
+            if mines or safes:
+                for mine in list(mines):
+                    self.mark_mine(mine)
+                for safe in list(safes):
+                    self.mark_safe(safe)
+                continue
+
+            related = set()
+            for cell in key:
+                related.update(self.index[cell])
+            related.discard(key)
+            for other_key in related:
+                other = self.knowledge[other_key]
+                if key < other_key:
+                    self.add_sentence(Sentence(
+                        other_key - key, other.count - sentence.count))
+                elif other_key < key:
+                    self.add_sentence(Sentence(
+                        key - other_key, sentence.count - other.count))
 
     def add_knowledge(self, cell, count):
         """
@@ -224,6 +288,7 @@ class MinesweeperAI():
 
         # 1 : Mark the cell as a move that has been made
         self.moves_made.add(cell)
+        self.safe_moves.discard(cell)
 
         # 2 : Mark the cell as safe 
         self.mark_safe(cell)
@@ -253,26 +318,11 @@ class MinesweeperAI():
                 cells_new.add(i)
 
         # Add new sentence
-        sentence_new = Sentence(cells_new, count_new)
-
-        if (len(sentence_new.cells) > 0):
-            self.knowledge.append(sentence_new)
-
-        # 4 : Mark additional cells as safe or as mines if it can be concluded based on the AI's knowledge base
-        for sentence in self.knowledge:
-            if(len(sentence.cells) == 0):
-                self.knowledge.remove(sentence)
-        safes = list(sentence.known_safes())
-        for safe in safes:
-            self.mark_safe(safe)
-
-        mines = list(sentence.known_mines())
-        for mine in mines:
-            self.mark_mine(mine)
-        
-        
-        # 5 : Add Inferences if any
-        self.inference()               
+        self.add_sentence(Sentence(cells_new, count_new))
+
+        # 4 and 5 : Mark cells as safe or as mines and add new sentences,
+        # propagating from the new sentence and any it changes
+        self.inference()
 
     def make_safe_move(self):
         """
@@ -280,10 +330,11 @@ class MinesweeperAI():
         The move must be known to be safe, and not already a move
         that has been made.
 
-        This function may use the knowledge in self.mines, self.safes
-        and self.moves_made, but should not modify any of those values.
+        This function may use the knowledge in self.mines, self.safes,
+        self.safe_moves and self.moves_made, but should not modify any
+        of those values.
         """
-        for i in self.safes - self.moves_made:
+        for i in self.safe_moves:
             return i      
 
         return None  